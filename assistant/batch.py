@@ -0,0 +1,232 @@
+"""Batch runner for regression runs over many prompts.
+
+    python -m assistant.cli batch tasks.jsonl results.jsonl --concurrency 8
+    python -m assistant.cli batch tasks.jsonl results.jsonl --script replies.jsonl
+    python -m assistant.cli batch tasks.jsonl results.jsonl --record replies.jsonl --sandbox
+
+Each task line is {"id": "...", "task": "...", "max_turns": 20}; id and
+max_turns are optional. Tasks run on the same AgentEngine as the chat
+window, each with a fake computer and its own shell, started in a
+throwaway directory with a minimal environment. That alone does not stop
+a command from reaching the rest of the host. With isolate=True (the
+CLI's --sandbox) the shell runs in an OS sandbox instead: bwrap on Linux,
+sandbox-exec on macOS. Either way it has no network and can write only
+to its directory. The CLI refuses to run a live model's commands on the
+host unless --sandbox or --unsafe-host-shell is given.
+
+A result line is appended as each task finishes, and running again with
+the same results file skips tasks that already have one.
+"""
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, asdict
+from typing import IO, Dict, List, Optional, Set
+from .services.agent import AgentEngine, MAX_TURNS
+from .services.budget import RequestPlanner
+from .services.cancellation import CancellationToken
+from .services.command_executor import BashSession
+from .services.computer import FakeComputer
+from .services.macros import MacroCache
+
+DEFAULT_CONCURRENCY = 4
+
+
+@dataclass
+class BatchTask:
+    id: str
+    task: str
+    max_turns: int = MAX_TURNS
+
+
+@dataclass
+class TaskResult:
+    """One line of the results file; times are in seconds"""
+    id: str
+    task: str
+    status: str  # done, error or cancelled
+    response: str = ""
+    error: Optional[str] = None
+    tool_calls: int = 0
+    seconds: float = 0.0
+    first_text_seconds: Optional[float] = None
+    tool_seconds: float = 0.0
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+def load_tasks(path: str) -> List[BatchTask]:
+    tasks = []
+    with open(path, 'r') as f:
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            tasks.append(BatchTask(str(entry.get("id", number)), entry["task"],
+                                   entry.get("max_turns", MAX_TURNS)))
+    return tasks
+
+
+def completed_ids(results_path: str) -> Set[str]:
+    """Ids that already have a result; a torn last line from a crash is ignored"""
+    done = set()
+    try:
+        with open(results_path, 'r') as f:
+            for line in f:
+                try:
+                    done.add(json.loads(line)["id"])
+                except (ValueError, KeyError, TypeError):
+                    continue
+    except FileNotFoundError:
+        pass
+    return done
+
+
+def _ends_mid_line(path: str) -> bool:
+    try:
+        with open(path, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            if f.tell() == 0:
+                return False
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) != b"\n"
+    except FileNotFoundError:
+        return False
+
+
+# macOS sandbox profile: no network, writes only under DIR
+SANDBOX_PROFILE = """(version 1)
+(allow default)
+(deny network*)
+(deny file-write*)
+(allow file-write* (subpath (param "DIR")) (literal "/dev/null") (literal "/dev/tty")
+    (regex #"^/dev/fd/"))
+"""
+
+
+class SandboxUnavailable(RuntimeError):
+    pass
+
+
+def task_env(directory: str) -> Dict[str, str]:
+    """Minimal environment for a task's shell: no inherited secrets, home in its directory"""
+    return {
+        "HOME": directory,
+        "TMPDIR": directory,
+        "PATH": os.environ.get("PATH", "/usr/bin:/bin:/usr/sbin:/sbin"),
+        "LANG": os.environ.get("LANG", "en_US.UTF-8"),
+    }
+
+
+def sandbox_wrapper(directory: str) -> List[str]:
+    """Command prefix that runs a shell isolated from the host: no network,
+    read-only everywhere except directory"""
+    directory = os.path.realpath(directory)
+    if sys.platform == "darwin" and shutil.which("sandbox-exec"):
+        return ["sandbox-exec", "-D", f"DIR={directory}", "-p", SANDBOX_PROFILE]
+    if shutil.which("bwrap"):
+        return ["bwrap", "--ro-bind", "/", "/", "--dev", "/dev", "--proc", "/proc",
+                "--tmpfs", "/tmp", "--bind", directory, directory, "--chdir", directory,
+                "--unshare-all", "--die-with-parent", "--new-session"]
+    raise SandboxUnavailable("No sandbox available: install bubblewrap (bwrap) "
+                             "or run on macOS with sandbox-exec")
+
+
+class BatchRunner:
+    """Runs tasks through AgentEngine with at most `concurrency` in flight.
+
+    With isolate=True each task's shell runs in an OS sandbox; otherwise it
+    runs on the host with the user's rights.
+    """
+
+    def __init__(self, api_client, concurrency: int = DEFAULT_CONCURRENCY,
+                 work_root: Optional[str] = None, planner: Optional[RequestPlanner] = None,
+                 macros: Optional[MacroCache] = None, isolate: bool = False):
+        self.api_client = api_client
+        self.concurrency = concurrency
+        self.work_root = work_root
+        self.planner = planner
+        self.macros = macros
+        self.isolate = isolate
+        if isolate:
+            sandbox_wrapper(tempfile.gettempdir())  # fail before any task starts
+
+    def run_task(self, task: BatchTask,
+                 cancel_token: Optional[CancellationToken] = None) -> TaskResult:
+        result = TaskResult(task.id, task.task, "error")
+        directory = tempfile.mkdtemp(prefix="assistant-batch-", dir=self.work_root)
+        wrapper = sandbox_wrapper(directory) if self.isolate else None
+        bash = BashSession(cwd=directory, env=task_env(directory), wrapper=wrapper)
+        engine = AgentEngine(self.api_client, bash, FakeComputer(), max_turns=task.max_turns,
+                             planner=self.planner, macros=self.macros)
+
+        start = time.perf_counter()
+        tool_start = None
+        try:
+            for event in engine.run(task.task, cancel_token):
+                now = time.perf_counter()
+                if event.type == "text":
+                    if result.first_text_seconds is None:
+                        result.first_text_seconds = now - start
+                    result.response += event.text
+                elif event.type == "tool_use":
+                    result.tool_calls += 1
+                    tool_start = now
+                elif event.type == "tool_result" and tool_start is not None:
+                    result.tool_seconds += now - tool_start
+                    tool_start = None
+                elif event.type == "error":
+                    result.error = event.error
+                elif event.type in ("done", "cancelled"):
+                    result.status = event.type
+        except Exception as e:
+            result.error = str(e)
+        finally:
+            bash.close()
+            shutil.rmtree(directory, ignore_errors=True)
+
+        result.seconds = time.perf_counter() - start
+        return result
+
+    def run(self, tasks: List[BatchTask], results_path: str,
+            log: Optional[IO[str]] = None) -> List[TaskResult]:
+        """Run the tasks not yet in results_path, appending a line per finished task.
+
+        On Ctrl-C the running tasks are cancelled and left out of the file,
+        so the next run picks them up again.
+        """
+        done = completed_ids(results_path)
+        pending = [task for task in tasks if task.id not in done]
+        if log and len(pending) < len(tasks):
+            log.write(f"Skipping {len(tasks) - len(pending)} tasks with results\n")
+
+        results = []
+        tokens = [CancellationToken() for _ in pending]
+        torn = _ends_mid_line(results_path)
+        with open(results_path, 'a') as out, ThreadPoolExecutor(self.concurrency) as pool:
+            if torn:
+                out.write("\n")
+            futures = [pool.submit(self.run_task, task, token)
+                       for task, token in zip(pending, tokens)]
+            try:
+                for future in as_completed(futures):
+                    result = future.result()
+                    if result.status == "cancelled":
+                        continue
+                    out.write(json.dumps(result.to_dict()) + "\n")
+                    out.flush()
+                    results.append(result)
+                    if log:
+                        log.write(f"[{len(results)}/{len(pending)}] {result.id}: {result.status} "
+                                  f"in {result.seconds:.2f}s\n")
+            except KeyboardInterrupt:
+                for token in tokens:
+                    token.cancel()
+                pool.shutdown(cancel_futures=True)
+                raise
+        return results
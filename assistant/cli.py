@@ -0,0 +1,241 @@
+"""Headless agent runner.
+
+    python -m assistant.cli run "list the files in ~/Downloads"
+    python -m assistant.cli daemon [--socket PATH]
+    python -m assistant.cli submit "open Chrome" [--socket PATH]
+    python -m assistant.cli batch TASKS RESULTS [--concurrency N] [--script FILE | --record FILE]
+                                [--sandbox | --unsafe-host-shell]
+
+Events are written as JSON lines. The daemon accepts one task per
+connection on a local Unix socket: the client sends {"task": "..."} as a
+single line and reads events until the connection closes.
+
+Set ASSISTANT_TRACE=trace.json to record a Chrome trace of the run, and
+pass --macros FILE (or set ASSISTANT_MACROS) to replay repeated tasks
+from a macro cache (see assistant.services.macros).
+"""
+import argparse
+import json
+import os
+import socket
+import socketserver
+import sys
+import tempfile
+import time
+from typing import IO, Iterable, Optional
+from dotenv import load_dotenv
+from .batch import DEFAULT_CONCURRENCY, BatchRunner, SandboxUnavailable, load_tasks
+from .services import tracing
+from .services.agent import AgentEngine, AgentEvent, MAX_TURNS
+from .services.api_client import AnthropicClient
+from .services.budget import BudgetTargets, RequestPlanner
+from .services.command_executor import CommandExecutor
+from .services.computer import ScreenArbiter
+from .services.macros import MacroCache, cache_from_env, summary as macro_summary
+from .services.scripted_client import RecordingClient, ScriptedClient
+
+
+def default_socket_path() -> str:
+    return os.path.join(tempfile.gettempdir(), f"assistant-{os.getuid()}.sock")
+
+
+def write_events(events: Iterable[AgentEvent], stream: IO[str]) -> bool:
+    """Write events as JSON lines; returns whether the run finished cleanly"""
+    finished = False
+    try:
+        for event in events:
+            stream.write(json.dumps(event.to_dict()) + "\n")
+            stream.flush()
+            finished = event.type == "done"
+    except Exception as e:
+        stream.write(json.dumps(AgentEvent("error", error=str(e)).to_dict()) + "\n")
+        stream.flush()
+    return finished
+
+
+class _TextWriter:
+    """Minimal text stream over a socket's binary file"""
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, text: str):
+        self.stream.write(text.encode('utf-8'))
+
+    def flush(self):
+        self.stream.flush()
+
+
+class TaskHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        out = _TextWriter(self.wfile)
+        try:
+            request = json.loads(self.rfile.readline())
+            task = request["task"]
+        except (ValueError, KeyError, TypeError):
+            write_events([AgentEvent("error", error='Expected {"task": "..."}')], out)
+            return
+        engine = self.server.make_engine(request.get("max_turns"))
+        try:
+            write_events(engine.run(task), out)
+        except BrokenPipeError:
+            pass  # client went away; the generator is closed with the connection
+
+
+class AgentDaemon(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, api_client: AnthropicClient, max_turns: int = MAX_TURNS,
+                 planner: RequestPlanner = None, macros: MacroCache = None):
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        super().__init__(socket_path, TaskHandler)
+        os.chmod(socket_path, 0o600)
+        self.socket_path = socket_path
+        self.api_client = api_client
+        self.max_turns = max_turns
+        self.planner = planner
+        self.macros = macros
+        # Concurrent tasks share the client's connection pool but take turns on the screen
+        self.screen = ScreenArbiter()
+
+    def make_engine(self, max_turns: int = None) -> AgentEngine:
+        return AgentEngine(self.api_client, CommandExecutor(), max_turns=max_turns or self.max_turns,
+                           screen=self.screen, planner=self.planner, macros=self.macros)
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+
+def submit(task: str, socket_path: str, stream: IO[str]) -> bool:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.connect(socket_path)
+        client.sendall((json.dumps({"task": task}) + "\n").encode('utf-8'))
+        finished = False
+        for line in client.makefile('r', encoding='utf-8'):
+            stream.write(line)
+            stream.flush()
+            finished = json.loads(line).get("type") == "done"
+        return finished
+
+
+def load_macros(args) -> Optional[MacroCache]:
+    """--macros if given, else ASSISTANT_MACROS (1 means macros.json here)"""
+    if args.macros:
+        return MacroCache(args.macros)
+    return cache_from_env(os.path.join(os.getcwd(), "macros.json"))
+
+
+def report_macros() -> None:
+    summary = macro_summary()
+    if summary:
+        print(summary, file=sys.stderr)
+
+
+def run_batch(args) -> int:
+    if not (args.script or args.sandbox or args.unsafe_host_shell):
+        print("A live model's shell commands would run on this host with your rights. "
+              "Pass --sandbox to isolate them, or --unsafe-host-shell to allow it.", file=sys.stderr)
+        return 2
+    if args.script:
+        api_client = ScriptedClient.load(args.script)
+    else:
+        api_client = AnthropicClient(os.getenv('ANTHROPIC_API_KEY'), max_concurrent=args.concurrency)
+        if args.record:
+            api_client = RecordingClient(api_client, args.record)
+
+    tasks = load_tasks(args.tasks)
+    try:
+        runner = BatchRunner(api_client, args.concurrency,
+                             planner=RequestPlanner(BudgetTargets.from_env(), args.budget_log),
+                             macros=load_macros(args), isolate=args.sandbox)
+    except SandboxUnavailable as e:
+        print(e, file=sys.stderr)
+        return 2
+    start = time.perf_counter()
+    try:
+        results = runner.run(tasks, args.results, sys.stderr)
+    except KeyboardInterrupt:
+        print("Interrupted; run again with the same results file to resume", file=sys.stderr)
+        return 130
+    finally:
+        if isinstance(api_client, RecordingClient):
+            api_client.save()
+
+    elapsed = time.perf_counter() - start
+    failed = sum(1 for result in results if result.status != "done")
+    print(f"{len(results)} tasks in {elapsed:.1f}s ({len(results) / max(elapsed, 1e-9):.1f}/s), "
+          f"{failed} failed", file=sys.stderr)
+    report_macros()
+    return 1 if failed else 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="assistant", description="Headless agent runner")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="run one task and stream events to stdout")
+    run_parser.add_argument("task")
+    run_parser.add_argument("--max-turns", type=int, default=MAX_TURNS)
+    run_parser.add_argument("--budget-log", help="append each request's budget plan and usage here")
+    run_parser.add_argument("--macros", help="replay and record repeated tasks in this macro file")
+
+    daemon_parser = commands.add_parser("daemon", help="serve tasks on a Unix socket")
+    daemon_parser.add_argument("--socket", default=default_socket_path())
+    daemon_parser.add_argument("--max-turns", type=int, default=MAX_TURNS)
+    daemon_parser.add_argument("--budget-log", help="append each request's budget plan and usage here")
+    daemon_parser.add_argument("--macros", help="replay and record repeated tasks in this macro file")
+
+    submit_parser = commands.add_parser("submit", help="send a task to a running daemon")
+    submit_parser.add_argument("task")
+    submit_parser.add_argument("--socket", default=default_socket_path())
+
+    batch_parser = commands.add_parser("batch", help="run a JSONL file of tasks (see assistant.batch)")
+    batch_parser.add_argument("tasks")
+    batch_parser.add_argument("results")
+    batch_parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    batch_parser.add_argument("--budget-log", help="append each request's budget plan and usage here")
+    batch_parser.add_argument("--macros", help="replay and record repeated tasks in this macro file")
+    replies = batch_parser.add_mutually_exclusive_group()
+    replies.add_argument("--script", help="play back scripted replies instead of calling the API")
+    replies.add_argument("--record", help="record the API's replies as a script")
+    batch_parser.add_argument("--sandbox", action="store_true",
+                              help="run each task's shell in an OS sandbox (bwrap or sandbox-exec)")
+    batch_parser.add_argument("--unsafe-host-shell", action="store_true",
+                              help="let a live model's shell commands run on this host unsandboxed")
+
+    args = parser.parse_args(argv)
+    load_dotenv()
+    tracing.configure_from_env(os.getcwd())
+
+    if args.command == "submit":
+        return 0 if submit(args.task, args.socket, sys.stdout) else 1
+    if args.command == "batch":
+        return run_batch(args)
+
+    api_client = AnthropicClient(os.getenv('ANTHROPIC_API_KEY'))
+    planner = RequestPlanner(BudgetTargets.from_env(), args.budget_log)
+    macros = load_macros(args)
+    if args.command == "run":
+        engine = AgentEngine(api_client, CommandExecutor(), max_turns=args.max_turns, planner=planner,
+                             macros=macros)
+        finished = write_events(engine.run(args.task), sys.stdout)
+        report_macros()
+        return 0 if finished else 1
+
+    server = AgentDaemon(args.socket, api_client, args.max_turns, planner, macros)
+    print(f"Listening on {args.socket}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        report_macros()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,69 +1,86 @@
 import sys
 import os
 from PyQt6.QtWidgets import QApplication
-from PyQt6.QtCore import QTimer
-import rumps
 from dotenv import load_dotenv
 from .windows.chat_window import ChatWindow
-from .services.api_client import AnthropicClient
-from .services.history_manager import HistoryManager
+from .services import macros, tracing
+from .services.metrics import metrics
+from .services.registry import Services
+from .tray import create_tray
+from .ui.styles import apply_stylesheet
 
 HISTORY_FILE = '~/Library/Application Support/MacAssistant/history.json'
-ICON_PATH = "icon.png"
-
-class MenuBarApp(rumps.App):
-    def __init__(self):
-        super().__init__("Assistant", icon=ICON_PATH)
+OUTPUT_DIR = '~/Library/Application Support/MacAssistant/outputs'
+SESSIONS_DIR = '~/Library/Application Support/MacAssistant/sessions'
+TRACE_DIR = '~/Library/Application Support/MacAssistant/traces'
+BUDGET_LOG = '~/Library/Application Support/MacAssistant/budget.jsonl'
+MACRO_FILE = '~/Library/Application Support/MacAssistant/macros.json'
+ICON_PATH = os.path.join(os.path.dirname(__file__), "icon.png")
 
+class MenuBarApp:
+    def __init__(self, tray_backend: str = None):
         load_dotenv()
+        tracing.configure_from_env(TRACE_DIR)
 
-        # Initialize services
-        self.history_manager = HistoryManager(HISTORY_FILE)
-        self.api_client = AnthropicClient(os.getenv('ANTHROPIC_API_KEY'))
+        # Services are constructed on first use
+        self.services = Services(HISTORY_FILE, OUTPUT_DIR, SESSIONS_DIR, BUDGET_LOG, MACRO_FILE)
 
         # Initialize Qt application
         self.qt_app = QApplication(sys.argv)
-        self.chat_window = ChatWindow(self.history_manager, self.api_client)
+        apply_stylesheet(self.qt_app)
+        self.chat_window = ChatWindow(self.services)
 
         # Show window immediately
         self.chat_window.show()
         self.chat_window.raise_()
         self.chat_window.activateWindow()
 
-        # Menu items
-        self.menu = [
-            rumps.MenuItem("Show Window", callback=self.show_window),
-            rumps.MenuItem("Clear History", callback=self.clear_history),
-        ]
-
-    def run(self):
-        # Process Qt events while running rumps
-        timer = QTimer()
-        timer.timeout.connect(self.process_qt_events)
-        timer.start(100)  # Check every 100ms
-
-        super().run()
+        # Menu-bar / tray front end; it runs the single loop that also drives Qt
+        self.tray = create_tray("Assistant", ICON_PATH, tray_backend)
+        self.tray.on_quit(self.chat_window.shutdown)
+        self.tray.add_action("Show Window", self.show_window)
+        self.tray.add_action("Clear History", self.clear_history)
+        self.tray.add_action("Toggle Tracing", self.toggle_tracing)
+        self.tray.add_action("Show Metrics", self.show_metrics)
 
-    def process_qt_events(self):
-        self.qt_app.processEvents()
+    def run(self) -> int:
+        return self.tray.run(self.qt_app)
 
-    def show_window(self, _):
+    def show_window(self):
         self.chat_window.show()
         self.chat_window.raise_()
         self.chat_window.activateWindow()
 
-    def clear_history(self, _):
-        self.history_manager.clear_history()
-        if self.chat_window.isVisible():
-            self.chat_window.load_chat_history()
+    def clear_history(self):
+        self.services.session_manager.clear_history()
+        self.services.output_store.clear()
+        # Hidden views too: their transcripts point at the outputs just deleted
+        self.chat_window.load_chat_history()
+
+    def toggle_tracing(self):
+        if tracing.tracer.enabled:
+            path = tracing.tracer.stop()
+            message = (f"Trace written to {path}\n\nOpen it in chrome://tracing or Perfetto."
+                       if path else "The trace could not be written.")
+            self.tray.show_message("Tracing Stopped", message)
+        else:
+            tracing.tracer.start(tracing.default_trace_path(TRACE_DIR))
+            self.tray.show_message("Tracing Started",
+                                   f"Choose Toggle Tracing again to stop and write the trace to "
+                                   f"{tracing.tracer.path}")
+
+    def show_metrics(self):
+        """Every counter, with the macro hit rate and time saved first when there is one"""
+        summary = macros.summary()
+        text = metrics.summary()
+        self.tray.show_message("Metrics", f"{summary}\n\n{text}" if summary else text)
 
-    def quit_app(self, _):
-        self.qt_app.quit()
-        rumps.quit_application()
+    def quit_app(self):
+        self.tray.quit()
 
 def main():
     app = MenuBarApp()
-    app.run()
+    sys.exit(app.run())
 
 if __name__ == "__main__":
     main()
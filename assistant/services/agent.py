@@ -0,0 +1,249 @@
+import json
+import time
+import uuid
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, Generator, List, Optional
+from . import tracing
+from .api_client import AnthropicClient
+from .budget import RequestPlanner
+from .cancellation import CancellationToken
+from .command_executor import CommandExecutor
+from .computer import Computer, ScreenArbiter
+from .macros import SETTLE_ATTEMPTS, SETTLE_DELAY, Macro, MacroCache, MacroStep, dhash, \
+    macro_from_messages
+from .tools import ToolResult
+
+MAX_TURNS = 20
+# Tools the engine can execute; a planned request advertises only these
+SUPPORTED_TOOLS = ("computer", "bash")
+
+
+@dataclass
+class AgentEvent:
+    """One step of an agent run; serialized as a JSON line by the headless CLI"""
+    type: str  # text, tool_use, tool_result, error, cancelled or done
+    text: Optional[str] = None
+    tool: Optional[str] = None
+    input: Optional[Dict[str, Any]] = None
+    output: Optional[str] = None
+    error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {key: value for key, value in asdict(self).items() if value is not None}
+
+
+def _finished(messages: List[Dict]) -> bool:
+    """Whether the conversation ends in a final assistant reply with no tool calls left unanswered"""
+    last = messages[-1]
+    return last["role"] == "assistant" and not any(
+        block["type"] == "tool_use" for block in last["content"])
+
+
+class AgentEngine:
+    """Runs a task against the model, executing tool calls until it finishes.
+
+    Shared by the chat window's MessageWorker and the headless CLI/daemon.
+    Passing a context list makes tasks continue one conversation: each
+    completed task stays in it, while a cancelled or failed one is rolled
+    back so the next request is still well formed. With a screen arbiter,
+    the engine holds the screen from its first computer action until the
+    task ends. With a planner, each task's screenshot size and each
+    request's tools, max_tokens and screenshot history are budgeted.
+    With a macro cache, repeated tasks are replayed without the model.
+    """
+
+    def __init__(self, api_client: AnthropicClient, command_executor: CommandExecutor,
+                 computer: Optional[Computer] = None, max_turns: int = MAX_TURNS,
+                 context: Optional[List[Dict]] = None, screen: Optional[ScreenArbiter] = None,
+                 planner: Optional[RequestPlanner] = None, macros: Optional[MacroCache] = None):
+        self.api_client = api_client
+        self.command_executor = command_executor
+        self.computer = computer or Computer()
+        self.max_turns = max_turns
+        self.context = context
+        self.screen = screen
+        self.planner = planner
+        self.macros = macros
+
+    def execute_tool(self, tool: str, tool_input: Dict,
+                     cancel_token: Optional[CancellationToken] = None) -> ToolResult:
+        try:
+            with tracing.span(f"tool.{tool}", cat="tool", action=tool_input.get("action")):
+                return self._execute_tool(tool, tool_input, cancel_token)
+        except Exception as e:
+            # e.g. no display for the computer tool on a headless host
+            return ToolResult(error=f"{tool} failed: {e}")
+
+    def _execute_tool(self, tool: str, tool_input: Dict,
+                      cancel_token: Optional[CancellationToken]) -> ToolResult:
+        if tool == "bash":
+            if "command" not in tool_input:
+                return ToolResult(error="No command given")
+            stdout, stderr = self.command_executor.execute_command(
+                tool_input["command"], cancel_token=cancel_token
+            )
+            return ToolResult(output=stdout, error=stderr or "")
+        if tool == "computer":
+            if self.screen and not self.screen.acquire(self, cancel_token):
+                return ToolResult(error="Cancelled while waiting for the screen")
+            return self.computer.run(tool_input)
+        return ToolResult(error=f"Tool {tool} is not supported")
+
+    def run(self, task: str,
+            cancel_token: Optional[CancellationToken] = None) -> Generator[AgentEvent, None, None]:
+        messages: List[Dict] = self.context if self.context is not None else []
+        start = len(messages)
+        messages.append({"role": "user", "content": task})
+        cancel_token = cancel_token or CancellationToken()
+        if self.planner:
+            # Fixed for the whole task so coordinates stay consistent between screenshots
+            self.computer.width, self.computer.height = self.planner.choose_resolution()
+        try:
+            # A macro only stands for its prompt in a fresh conversation: "yes" means
+            # something different after each question
+            if self.macros and start == 0:
+                yield from self._run_with_macros(task, messages, cancel_token)
+            else:
+                yield from self._run_turns(messages, cancel_token)
+        finally:
+            if not _finished(messages):
+                del messages[start:]
+            if self.screen:
+                self.screen.release(self)
+
+    def _run_with_macros(self, task: str, messages: List[Dict],
+                         cancel_token: CancellationToken) -> Generator[AgentEvent, None, None]:
+        """Replay a saved macro for the task, falling back to the model if it
+        diverges; without one, run the model and save what it did"""
+        started = time.perf_counter()
+        first = len(messages) - 1
+        try:
+            screen = dhash(self.computer.screenshot())
+        except Exception:
+            screen = None
+        if screen is None:
+            # No display, e.g. a headless host: nothing to tell one start apart from another
+            yield from self._run_turns(messages, cancel_token)
+            return
+        macro = self.macros.lookup(task, screen)
+        if macro:
+            self.computer.width, self.computer.height = macro.display
+            outcome = yield from self._replay(macro, messages, cancel_token)
+            if outcome == "cancelled":
+                return
+            if outcome == "diverged":
+                self.macros.diverged(macro)
+            # The model writes the reply from the replayed results, or takes over
+            yield from self._run_turns(messages, cancel_token)
+            if outcome == "replayed" and _finished(messages):
+                self.macros.replayed(macro, time.perf_counter() - started)
+            return
+
+        yield from self._run_turns(messages, cancel_token)
+        if _finished(messages):
+            recorded = macro_from_messages(task, screen, (self.computer.width, self.computer.height),
+                                           messages[first:], time.perf_counter() - started)
+            if recorded:
+                self.macros.record(recorded)
+
+    def _replay(self, macro: Macro, messages: List[Dict],
+                cancel_token: CancellationToken) -> Generator[AgentEvent, None, str]:
+        """Make a macro's calls as if the model had asked for them. Returns "replayed"
+        with the conversation ending at the last call's results, "cancelled", or
+        "diverged" with the conversation ending at the mismatched call."""
+        for turn in macro.turns:
+            content = [{"type": "text", "text": turn.text}] if turn.text else []
+            if turn.text:
+                yield AgentEvent("text", text=turn.text)
+            results = []
+            for step in turn.steps:
+                if cancel_token.cancelled:
+                    yield AgentEvent("cancelled")
+                    return "cancelled"
+                tool_id = f"toolu_macro_{uuid.uuid4().hex[:24]}"
+                content.append({"type": "tool_use", "id": tool_id, "name": step.tool,
+                                "input": step.input})
+                yield AgentEvent("tool_use", tool=step.tool, input=step.input)
+                result = self.execute_tool(step.tool, step.input, cancel_token)
+                matched = self._settle(step, result, cancel_token)
+                yield AgentEvent("tool_result", tool=step.tool, output=result.output,
+                                 error=result.error or None)
+                results.append(result.to_content(tool_id))
+                if not matched:
+                    messages.append({"role": "assistant", "content": content})
+                    messages.append({"role": "user", "content": results})
+                    if cancel_token.cancelled:
+                        yield AgentEvent("cancelled")
+                        return "cancelled"
+                    return "diverged"
+            messages.append({"role": "assistant", "content": content})
+            messages.append({"role": "user", "content": results})
+        return "replayed"
+
+    def _settle(self, step: MacroStep, result: ToolResult,
+                cancel_token: CancellationToken) -> bool:
+        """Whether a replayed call matches its recording. A mismatched screenshot
+        is retaken a few times first, since replays run ahead of the UI."""
+        matched = step.matches(result)
+        for _ in range(SETTLE_ATTEMPTS):
+            if matched or not result.base64_image or cancel_token.cancelled:
+                break
+            time.sleep(SETTLE_DELAY)
+            result.base64_image = self.computer.screenshot()
+            matched = step.matches(result)
+        return matched
+
+    def _run_turns(self, messages: List[Dict],
+                   cancel_token: CancellationToken) -> Generator[AgentEvent, None, None]:
+        for _ in range(self.max_turns):
+            text = ""
+            tool_calls = []
+            plan = None
+            if self.planner:
+                plan = self.planner.plan(messages, SUPPORTED_TOOLS,
+                                         (self.computer.width, self.computer.height))
+                stream = self.api_client.stream_response(plan.messages, cancel_token, plan.tools,
+                                                         plan.display, plan.max_tokens)
+            else:
+                stream = self.api_client.stream_response(messages, cancel_token)
+            for response in stream:
+                if plan and response.stop_reason:
+                    self.planner.record(plan, response.usage, response.stop_reason)
+                if response.text:
+                    text += response.text
+                    yield AgentEvent("text", text=response.text)
+                if response.tool:
+                    try:
+                        tool_input = json.loads(response.command)
+                    except json.JSONDecodeError:
+                        tool_input = {}
+                    tool_calls.append((response.tool_id, response.tool, tool_input))
+
+            if cancel_token.cancelled:
+                yield AgentEvent("cancelled")
+                return
+
+            content = [{"type": "text", "text": text}] if text else []
+            content += [{"type": "tool_use", "id": tool_id, "name": tool, "input": tool_input}
+                        for tool_id, tool, tool_input in tool_calls]
+            messages.append({"role": "assistant", "content": content})
+            if not tool_calls:
+                yield AgentEvent("done")
+                return
+
+            results = []
+            for tool_id, tool, tool_input in tool_calls:
+                if cancel_token.cancelled:
+                    yield AgentEvent("cancelled")
+                    return
+                yield AgentEvent("tool_use", tool=tool, input=tool_input)
+                result = self.execute_tool(tool, tool_input, cancel_token)
+                yield AgentEvent("tool_result", tool=tool, output=result.output,
+                                 error=result.error or None)
+                results.append(result.to_content(tool_id))
+            messages.append({"role": "user", "content": results})
+            if cancel_token.cancelled:
+                yield AgentEvent("cancelled")
+                return
+
+        yield AgentEvent("error", error=f"Stopped after {self.max_turns} turns")
@@ -1,18 +1,181 @@
 import os
 import json
-import requests
-from typing import Generator, Optional
+import re
+import base64
+import socket
+import threading
+from typing import Dict, Generator, Iterator, List, Optional, Sequence, Tuple, Union
 from dataclasses import dataclass
+from . import tracing
+from .cancellation import CancellationToken
+from .computer import DISPLAY_HEIGHT, DISPLAY_WIDTH
+
+# Streams allowed in flight at once across everything sharing one client
+MAX_CONCURRENT_STREAMS = 4
+# Seconds to wait for a TCP connection; the response itself may take as long as the model does
+CONNECT_TIMEOUT = 10
+MODEL = "claude-3-5-sonnet-20241022"
+DEFAULT_MAX_TOKENS = 1024
+ALL_TOOLS = ("computer", "str_replace_editor", "bash")
+# Strings made only of these need no escaping in JSON
+BASE64_ALPHABET = re.compile(r"[A-Za-z0-9+/=]*")
+
+
+def tool_schemas(names: Sequence[str] = ALL_TOOLS,
+                 display: Tuple[int, int] = (DISPLAY_WIDTH, DISPLAY_HEIGHT)) -> List[Dict]:
+    """Definitions for the named computer-use tools, in request order"""
+    schemas = {
+        "computer": {
+            "type": "computer_20241022",
+            "name": "computer",
+            "display_width_px": display[0],
+            "display_height_px": display[1],
+            "display_number": 1
+        },
+        "str_replace_editor": {
+            "type": "text_editor_20241022",
+            "name": "str_replace_editor"
+        },
+        "bash": {
+            "type": "bash_20241022",
+            "name": "bash"
+        }
+    }
+    return [schemas[name] for name in names]
+
+
+MEDIA_TYPES = {
+    'png': 'image/png',
+    'jpg': 'image/jpeg',
+    'jpeg': 'image/jpeg',
+    'gif': 'image/gif',
+    'webp': 'image/webp'
+}
+
+
+def encode_image(image_path: str) -> Tuple[str, str]:
+    """Base64 data and media type for an image file"""
+    with open(image_path, 'rb') as image_file:
+        image_data = base64.b64encode(image_file.read()).decode('utf-8')
+    extension = image_path.lower().split('.')[-1]
+    return image_data, MEDIA_TYPES.get(extension, 'image/jpeg')
+
+
+def message_content(text: str, image_paths: Optional[List[str]] = None) -> List[Dict]:
+    """User message content: the images, if any, followed by the text"""
+    content = []
+    for image_path in image_paths or []:
+        image_data, media_type = encode_image(image_path)
+        content.append({
+            "type": "image",
+            "source": {
+                "type": "base64",
+                "media_type": media_type,
+                "data": image_data
+            }
+        })
+    content.append({"type": "text", "text": text})
+    return content
+
+
+def _is_raw_base64(value: Dict) -> bool:
+    """Whether value is a base64 source whose data can be written into JSON unescaped"""
+    data = value.get("data")
+    return (value.get("type") == "base64" and isinstance(data, str) and
+            BASE64_ALPHABET.fullmatch(data) is not None)
+
+
+def _fragments(value, raw: List[str]) -> Iterator[Optional[str]]:
+    """value's compact JSON in pieces; base64 image data is appended to raw and
+    stands in the output as None, so the large strings are never copied here"""
+    if isinstance(value, dict):
+        yield "{"
+        for index, (key, item) in enumerate(value.items()):
+            yield ("," if index else "") + json.dumps(key) + ":"
+            if key == "data" and _is_raw_base64(value):
+                raw.append(item)
+                yield '"'
+                yield None
+                yield '"'
+            else:
+                yield from _fragments(item, raw)
+        yield "}"
+    elif isinstance(value, list):
+        yield "["
+        for index, item in enumerate(value):
+            if index:
+                yield ","
+            yield from _fragments(item, raw)
+        yield "]"
+    else:
+        yield json.dumps(value, allow_nan=False)
+
+
+class RequestBody:
+    """JSON request body sent in chunks rather than built as one string.
+
+    The JSON around the images is small and encoded up front. Base64 image
+    data is written straight from the caller's strings, one image at a
+    time, so a request with several screenshots never holds a full second
+    copy of them. Has a length, so it is sent with Content-Length.
+    """
+
+    CHUNK_SIZE = 256 * 1024
+
+    def __init__(self, data: Dict):
+        # Alternating JSON segments (bytes) and image data (str), in body order
+        self._parts: List[Union[bytes, str]] = []
+        raw: List[str] = []
+        pending: List[str] = []
+        for fragment in _fragments(data, raw):
+            if fragment is None:
+                self._parts.append("".join(pending).encode('utf-8'))
+                self._parts.append(raw[-1])
+                pending = []
+            else:
+                pending.append(fragment)
+        self._parts.append("".join(pending).encode('utf-8'))
+        self.images = len(raw)
+        self._length = sum(len(part) for part in self._parts)
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __iter__(self) -> Iterator[memoryview]:
+        for part in self._parts:
+            if isinstance(part, str):
+                part = part.encode('ascii')
+            view = memoryview(part)
+            for start in range(0, len(view), self.CHUNK_SIZE):
+                yield view[start:start + self.CHUNK_SIZE]
+
+    def getvalue(self) -> bytes:
+        """The whole body as one bytes object, for debugging and tests"""
+        return b"".join(self)
+
 
 @dataclass
 class APIResponse:
     text: str
     tool: Optional[str]
     command: Optional[str]
+    tool_id: Optional[str] = None
+    stop_reason: Optional[str] = None
+    usage: Optional[Dict[str, int]] = None  # token counts reported by the stream, on the final response
 
 class AnthropicClient:
-    def __init__(self, api_key: str):
+    """Messages API client; one instance is shared by every session.
+
+    Requests go through a single pooled HTTP session, and at most
+    max_concurrent streams run at once; further callers wait for a slot.
+    """
+
+    def __init__(self, api_key: str, max_concurrent: int = MAX_CONCURRENT_STREAMS):
         self.api_key = api_key
+        self.max_concurrent = max_concurrent
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+        self._session = None
+        self._session_lock = threading.Lock()
         self.base_url = "https://api.anthropic.com/v1"
         self.headers = {
             "content-type": "application/json",
@@ -21,72 +184,202 @@ class AnthropicClient:
             "anthropic-beta": "computer-use-2024-10-22"
         }
 
-    def stream_response(self, message: str) -> Generator[APIResponse, None, None]:
+    def _transport(self):
+        """Pooled requests.Session, created on the first API call"""
+        with self._session_lock:
+            if self._session is None:
+                # requests is heavy to import; load it on the first API call, not at startup
+                import requests
+                from requests.adapters import HTTPAdapter
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_concurrent)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                self._session = session
+            return self._session
+
+    def _acquire_slot(self, cancel_token: Optional[CancellationToken]) -> bool:
+        """Wait for a free stream slot; gives up if the task is cancelled meanwhile"""
+        while not self._slots.acquire(timeout=0.1):
+            if cancel_token and cancel_token.cancelled:
+                return False
+        return True
+
+    @staticmethod
+    def _abort(response) -> None:
+        """Unblock a stream being read on another thread by shutting its socket down"""
+        connection = getattr(response.raw, "_connection", None)
+        sock = getattr(connection, "sock", None)
+        try:
+            if sock is not None:
+                sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        response.close()
+
+    def stream_response(self, message: Union[str, List[Dict]],
+                        cancel_token: Optional[CancellationToken] = None,
+                        tools: Sequence[str] = ALL_TOOLS,
+                        display: Tuple[int, int] = (DISPLAY_WIDTH, DISPLAY_HEIGHT),
+                        max_tokens: int = DEFAULT_MAX_TOKENS
+                        ) -> Generator[APIResponse, None, None]:
+        """Stream a reply to a single prompt or to a full list of messages.
+
+        Text arrives as deltas. Each tool call is yielded once its input is
+        complete, and a final response carries the stop reason ("cancelled"
+        if cancel_token fired mid-stream) and the stream's token usage.
+        tools, display and max_tokens are normally chosen by RequestPlanner.
+        """
+        if isinstance(message, str):
+            messages = [{"role": "user", "content": message}]
+        else:
+            messages = message
+
         data = {
-            "model": "claude-3-5-sonnet-20241022",
-            "max_tokens": 1024,
+            "model": MODEL,
+            "max_tokens": max_tokens,
             "stream": True,
-            "tools": [
-                {
-                    "type": "computer_20241022",
-                    "name": "computer",
-                    "display_width_px": 1024,
-                    "display_height_px": 768,
-                    "display_number": 1
-                },
-                {
-                    "type": "text_editor_20241022",
-                    "name": "str_replace_editor"
-                },
-                {
-                    "type": "bash_20241022",
-                    "name": "bash"
-                }
-            ],
-            "messages": [{"role": "user", "content": message}]
+            "tools": tool_schemas(tools, display),
+            "messages": messages
         }
 
-        with requests.post(
-            f"{self.base_url}/messages",
-            headers=self.headers,
-            json=data,
-            stream=True
-        ) as response:
+        with tracing.span("api.wait_for_slot", cat="http"):
+            acquired = self._acquire_slot(cancel_token)
+        if not acquired:
+            yield APIResponse(None, None, None, stop_reason="cancelled")
+            return
+        try:
+            yield from self._stream(data, cancel_token)
+        finally:
+            self._slots.release()
+
+    def _post(self, body: RequestBody, cancel_token: Optional[CancellationToken]):
+        """Send the request and wait for the response headers; None if cancelled first.
+
+        The POST runs on a helper thread, so a cancel while the server has not
+        answered yet returns at once. A response that arrives after that is closed.
+        """
+        def post():
+            return self._transport().post(
+                f"{self.base_url}/messages",
+                headers=self.headers,
+                data=body,
+                stream=True,
+                timeout=(CONNECT_TIMEOUT, None)
+            )
+
+        if cancel_token is None:
+            return post()
+
+        answered = threading.Event()
+        lock = threading.Lock()
+        outcome = {}
+
+        def send():
+            try:
+                response, error = post(), None
+            except Exception as e:
+                response, error = None, e
+            with lock:
+                if outcome.get("abandoned"):
+                    if response is not None:
+                        response.close()
+                    return
+                outcome["response"], outcome["error"] = response, error
+                answered.set()
+
+        unregister = cancel_token.on_cancel(answered.set)
+        threading.Thread(target=send, name="APIRequest", daemon=True).start()
+        try:
+            answered.wait()
+        finally:
+            unregister()
+        with lock:
+            if "response" not in outcome:
+                outcome["abandoned"] = True
+                return None
+        if outcome["error"] is not None:
+            raise outcome["error"]
+        return outcome["response"]
+
+    def _stream(self, data: Dict,
+                cancel_token: Optional[CancellationToken]) -> Generator[APIResponse, None, None]:
+        if cancel_token and cancel_token.cancelled:
+            yield APIResponse(None, None, None, stop_reason="cancelled")
+            return
+        body = RequestBody(data)
+        with tracing.span("api.request", cat="http", messages=len(data["messages"]),
+                          bytes=len(body), images=body.images):
+            response = self._post(body, cancel_token)
+        if response is None:
+            yield APIResponse(None, None, None, stop_reason="cancelled")
+            return
+        with response, tracing.span("api.stream", cat="http") as stream_span:
             response.raise_for_status()
-            
-            text_response = ""
-            json_response = ""
-            tool = ""
-            
-            for line in response.iter_lines():
-                if line and line.startswith(b'data: '):
+            unregister = (cancel_token.on_cancel(lambda: self._abort(response))
+                          if cancel_token else (lambda: None))
+
+            # Tool-use blocks still receiving input, keyed by content block index
+            tool_blocks = {}
+            stop_reason = None
+            usage = {}
+            events = 0
+
+            try:
+                for line in response.iter_lines():
+                    if cancel_token and cancel_token.cancelled:
+                        break
+                    if not (line and line.startswith(b'data: ')):
+                        continue
+                    events += 1
                     try:
                         json_str = line[6:].decode('utf-8')
                         if json_str.strip() == "[DONE]":
                             break
-                            
+
                         chunk_data = json.loads(json_str)
-                        
-                        if 'type' in chunk_data:
-                            if (chunk_data['type'] == 'content_block_start' and 
-                                'content_block' in chunk_data and 
-                                chunk_data['content_block']['type'] == 'tool_use'):
-                                tool = chunk_data['content_block']['name']
-                                
-                            elif 'delta' in chunk_data:
-                                delta = chunk_data['delta']
-                                if not 'type' in delta:
-                                    continue
-                                if delta['type'] == 'text_delta' and 'text' in delta:
-                                    chunk_text = delta['text']
-                                    text_response += chunk_text
-                                    yield APIResponse(chunk_text, None, None)
-                                elif delta['type'] == 'input_json_delta' and 'partial_json' in delta:
-                                    json_response += delta['partial_json']
-                                    
+                        chunk_type = chunk_data.get('type')
+
+                        if chunk_type == 'content_block_start':
+                            block = chunk_data['content_block']
+                            if block['type'] == 'tool_use':
+                                tool_blocks[chunk_data['index']] = {
+                                    'id': block['id'], 'name': block['name'], 'json': ""
+                                }
+
+                        elif chunk_type == 'content_block_delta':
+                            delta = chunk_data['delta']
+                            if delta.get('type') == 'text_delta' and 'text' in delta:
+                                yield APIResponse(delta['text'], None, None)
+                            elif delta.get('type') == 'input_json_delta' and 'partial_json' in delta:
+                                tool_blocks[chunk_data['index']]['json'] += delta['partial_json']
+
+                        elif chunk_type == 'content_block_stop':
+                            block = tool_blocks.pop(chunk_data['index'], None)
+                            if block:
+                                yield APIResponse(None, block['name'], block['json'] or "{}",
+                                                  tool_id=block['id'])
+
+                        elif chunk_type == 'message_start':
+                            usage.update(chunk_data['message'].get('usage') or {})
+
+                        elif chunk_type == 'message_delta':
+                            stop_reason = chunk_data['delta'].get('stop_reason', stop_reason)
+                            usage.update(chunk_data.get('usage') or {})
+
                     except Exception as e:
                         print(f"Error processing chunk: {e}")
                         continue
-            
-            # Yield final complete response
-            yield APIResponse(None, tool, json_response)
\ No newline at end of file
+            except Exception:
+                # Reading fails once a cancel has shut the socket down
+                if not (cancel_token and cancel_token.cancelled):
+                    raise
+            finally:
+                unregister()
+                stream_span.set(events=events, stop_reason=stop_reason)
+
+            if cancel_token and cancel_token.cancelled:
+                stop_reason = "cancelled"
+
+            # Yield final response with the stop reason and usage
+            yield APIResponse(None, None, None, stop_reason=stop_reason, usage=usage or None)
@@ -0,0 +1,279 @@
+"""Request budget planning: estimate what a request costs before sending it.
+
+Estimates are deliberately cheap. Text is counted by characters, images by
+their pixel size (read from the PNG header, without decoding the image),
+and tool definitions by the fixed overheads documented for computer use.
+The tool and image estimates depend only on static inputs and are cached.
+
+Every plan can be logged next to the usage the stream reports, so the
+estimates can be checked against real numbers:
+
+    {"estimated_input_tokens": 5210, "input_tokens": 5034, "max_tokens": 1024, ...}
+"""
+import base64
+import json
+import math
+import os
+import threading
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+from . import tracing
+from .api_client import DEFAULT_MAX_TOKENS, tool_schemas
+
+CHARS_PER_TOKEN = 3.5
+MESSAGE_OVERHEAD_TOKENS = 4
+BLOCK_OVERHEAD_BYTES = 64  # JSON keys and punctuation around each content block
+
+# Images: the API scales anything larger down to these limits, then bills
+# about one token per 750 pixels
+IMAGE_PIXELS_PER_TOKEN = 750
+MAX_IMAGE_EDGE = 1568
+MAX_IMAGE_PIXELS = 1_150_000
+
+# Input tokens added for computer use: the system prompt, plus each tool's definition
+SYSTEM_PROMPT_TOKENS = 466
+TOOL_TOKENS = {"computer": 683, "str_replace_editor": 700, "bash": 245}
+
+# Screenshot sizes to choose from, largest first
+RESOLUTIONS = ((1280, 800), (1024, 768), (800, 600), (640, 480))
+MIN_OUTPUT_TOKENS = 256
+CONTEXT_WINDOW = 200_000
+OUTPUT_TOKENS_PER_SECOND = 50
+OMITTED_SCREENSHOT = {"type": "text", "text": "[older screenshot omitted]"}
+
+
+@dataclass
+class BudgetTargets:
+    """Limits the planner works within.
+
+    max_image_tokens picks the screenshot resolution; max_input_tokens and
+    max_request_bytes cap each request by dropping older screenshots;
+    max_output_tokens and turn_latency (seconds of generation) cap max_tokens.
+    """
+    max_image_tokens: int = 1_100
+    max_input_tokens: int = 40_000
+    max_request_bytes: int = 4_000_000
+    max_output_tokens: int = DEFAULT_MAX_TOKENS
+    turn_latency: Optional[float] = None
+
+    @classmethod
+    def from_env(cls) -> "BudgetTargets":
+        """Defaults, overridden by ASSISTANT_MAX_IMAGE_TOKENS, ASSISTANT_MAX_INPUT_TOKENS,
+        ASSISTANT_MAX_REQUEST_BYTES, ASSISTANT_MAX_OUTPUT_TOKENS and ASSISTANT_TURN_LATENCY"""
+        targets = cls()
+        for name, convert in (("max_image_tokens", int), ("max_input_tokens", int),
+                              ("max_request_bytes", int), ("max_output_tokens", int),
+                              ("turn_latency", float)):
+            value = os.getenv(f"ASSISTANT_{name.upper()}")
+            if value:
+                try:
+                    setattr(targets, name, convert(value))
+                except ValueError:
+                    print(f"Ignoring invalid ASSISTANT_{name.upper()}={value!r}")
+        return targets
+
+
+@dataclass
+class RequestPlan:
+    tools: Tuple[str, ...]
+    display: Tuple[int, int]
+    max_tokens: int
+    messages: List[Dict] = field(repr=False)  # what to send; older screenshots may be omitted
+    input_tokens: int = 0  # estimated
+    request_bytes: int = 0  # estimated
+    images_sent: int = 0
+    images_omitted: int = 0
+
+    def to_dict(self) -> Dict:
+        return {
+            "tools": list(self.tools),
+            "display": list(self.display),
+            "max_tokens": self.max_tokens,
+            "estimated_input_tokens": self.input_tokens,
+            "estimated_request_bytes": self.request_bytes,
+            "images_sent": self.images_sent,
+            "images_omitted": self.images_omitted,
+        }
+
+
+def text_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+@lru_cache(maxsize=64)
+def image_tokens(width: int, height: int) -> int:
+    """Tokens for an image of this size, after the API's own downscaling"""
+    scale = min(1.0, MAX_IMAGE_EDGE / max(width, height),
+                math.sqrt(MAX_IMAGE_PIXELS / (width * height)))
+    return math.ceil(int(width * scale) * int(height * scale) / IMAGE_PIXELS_PER_TOKEN)
+
+
+def image_size(data: str) -> Optional[Tuple[int, int]]:
+    """Width and height of a base64 PNG, read from its header"""
+    try:
+        header = base64.b64decode(data[:32])
+    except ValueError:
+        return None
+    if header[:8] != b"\x89PNG\r\n\x1a\n" or len(header) < 24:
+        return None
+    return int.from_bytes(header[16:20], "big"), int.from_bytes(header[20:24], "big")
+
+
+@lru_cache(maxsize=64)
+def tools_cost(tools: Tuple[str, ...], display: Tuple[int, int]) -> Tuple[int, int]:
+    """(tokens, bytes) the tool definitions and computer-use system prompt add to a request"""
+    if not tools:
+        return 0, 0
+    tokens = SYSTEM_PROMPT_TOKENS + sum(TOOL_TOKENS.get(name, 0) for name in tools)
+    return tokens, len(json.dumps(tool_schemas(tools, display)))
+
+
+def _block_cost(block: Dict, display: Tuple[int, int]) -> Tuple[int, int, int]:
+    """(tokens, bytes, images) for one content block"""
+    kind = block.get("type")
+    if kind == "text":
+        return text_tokens(block["text"]), len(block["text"]) + BLOCK_OVERHEAD_BYTES, 0
+    if kind == "image":
+        data = block["source"].get("data", "")
+        size = image_size(data) or display
+        return image_tokens(*size), len(data) + BLOCK_OVERHEAD_BYTES, 1
+    if kind == "tool_use":
+        arguments = json.dumps(block.get("input", {}))
+        return (text_tokens(block.get("name", "") + arguments),
+                len(arguments) + BLOCK_OVERHEAD_BYTES, 0)
+    if kind == "tool_result":
+        tokens, size, images = 0, BLOCK_OVERHEAD_BYTES, 0
+        content = block.get("content", [])
+        if isinstance(content, str):
+            content = [{"type": "text", "text": content}]
+        for inner in content:
+            inner_tokens, inner_size, inner_images = _block_cost(inner, display)
+            tokens, size, images = tokens + inner_tokens, size + inner_size, images + inner_images
+        return tokens, size, images
+    return 0, BLOCK_OVERHEAD_BYTES, 0
+
+
+def estimate(messages: List[Dict], tools: Tuple[str, ...],
+             display: Tuple[int, int]) -> Tuple[int, int]:
+    """Estimated (input tokens, request bytes) for a request"""
+    tokens, size = tools_cost(tools, display)
+    for message in messages:
+        content = message["content"]
+        if isinstance(content, str):
+            content = [{"type": "text", "text": content}]
+        tokens += MESSAGE_OVERHEAD_TOKENS
+        for block in content:
+            block_tokens, block_size, _ = _block_cost(block, display)
+            tokens += block_tokens
+            size += block_size
+    return tokens, size
+
+
+def _screenshots(messages: List[Dict]) -> List[Tuple[int, int, int]]:
+    """(message, block, image) positions of screenshots in tool results, oldest first"""
+    found = []
+    for m, message in enumerate(messages):
+        if message["role"] != "user" or isinstance(message["content"], str):
+            continue
+        for b, block in enumerate(message["content"]):
+            if block.get("type") != "tool_result" or isinstance(block.get("content"), str):
+                continue
+            for i, inner in enumerate(block.get("content", [])):
+                if inner.get("type") == "image":
+                    found.append((m, b, i))
+    return found
+
+
+def omit_screenshots(messages: List[Dict], count: int) -> List[Dict]:
+    """Copy of messages with the oldest `count` tool-result screenshots replaced by a note.
+
+    Only the messages that change are copied; the caller's list is untouched.
+    """
+    result = list(messages)
+    for m, b, i in _screenshots(messages)[:count]:
+        if result[m] is messages[m]:
+            result[m] = {**messages[m], "content": list(messages[m]["content"])}
+        content = result[m]["content"]
+        if content[b] is messages[m]["content"][b]:
+            content[b] = {**content[b], "content": list(content[b]["content"])}
+        content[b]["content"][i] = OMITTED_SCREENSHOT
+    return result
+
+
+class RequestPlanner:
+    """Chooses screenshot resolution, tools and max_tokens to stay within BudgetTargets.
+
+    Shared by every engine; log_path, if set, gets a JSON line per request
+    comparing the plan's estimates with the usage the API reported.
+    """
+
+    def __init__(self, targets: Optional[BudgetTargets] = None, log_path: Optional[str] = None):
+        self.targets = targets or BudgetTargets()
+        self.log_path = os.path.expanduser(log_path) if log_path else None
+        self._lock = threading.Lock()
+
+    def choose_resolution(self) -> Tuple[int, int]:
+        """Largest screenshot size whose image cost fits max_image_tokens"""
+        for width, height in RESOLUTIONS:
+            if image_tokens(width, height) <= self.targets.max_image_tokens:
+                return width, height
+        return RESOLUTIONS[-1]
+
+    def choose_max_tokens(self, input_tokens: int) -> int:
+        limit = self.targets.max_output_tokens
+        if self.targets.turn_latency:
+            limit = min(limit, int(self.targets.turn_latency * OUTPUT_TOKENS_PER_SECOND))
+        limit = min(limit, CONTEXT_WINDOW - input_tokens)
+        return max(MIN_OUTPUT_TOKENS, limit)
+
+    def plan(self, messages: List[Dict], tools: Sequence[str],
+             display: Tuple[int, int]) -> RequestPlan:
+        """Plan one request. tools should be the ones the caller can actually run;
+        advertising others costs tokens on every request for calls that would fail."""
+        tools = tuple(tools)
+        tokens, size = estimate(messages, tools, display)
+        screenshots = len(_screenshots(messages))
+
+        # Over budget: drop the oldest screenshots, always keeping the latest one
+        omitted = 0
+        sent = messages
+        if tokens > self.targets.max_input_tokens or size > self.targets.max_request_bytes:
+            low, high = 1, max(screenshots - 1, 0)
+            while low <= high:
+                middle = (low + high) // 2
+                candidate = omit_screenshots(messages, middle)
+                candidate_tokens, candidate_size = estimate(candidate, tools, display)
+                if (candidate_tokens <= self.targets.max_input_tokens and
+                        candidate_size <= self.targets.max_request_bytes):
+                    omitted, sent, tokens, size = middle, candidate, candidate_tokens, candidate_size
+                    high = middle - 1
+                else:
+                    low = middle + 1
+            if not omitted and screenshots > 1:
+                omitted = screenshots - 1
+                sent = omit_screenshots(messages, omitted)
+                tokens, size = estimate(sent, tools, display)
+
+        plan = RequestPlan(tools, display, self.choose_max_tokens(tokens), sent, tokens, size,
+                           screenshots - omitted, omitted)
+        tracing.instant("budget.plan", cat="budget", **plan.to_dict())
+        return plan
+
+    def record(self, plan: RequestPlan, usage: Optional[Dict[str, int]],
+               stop_reason: Optional[str]) -> None:
+        """Log a plan next to the usage reported for the request it shaped"""
+        if not self.log_path:
+            return
+        entry = plan.to_dict()
+        entry["stop_reason"] = stop_reason
+        entry.update(usage or {})
+        if usage and usage.get("input_tokens"):
+            entry["estimate_error"] = round(plan.input_tokens / usage["input_tokens"] - 1, 3)
+        try:
+            with self._lock:
+                os.makedirs(os.path.dirname(self.log_path) or ".", exist_ok=True)
+                with open(self.log_path, 'a') as f:
+                    f.write(json.dumps(entry) + "\n")
+        except Exception as e:
+            print(f"Error writing budget log: {e}")
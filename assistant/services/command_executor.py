@@ -1,19 +1,167 @@
+import os
+import selectors
+import shlex
+import signal
 import subprocess
-from typing import Optional, Tuple
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional, Tuple
+from . import tracing
+from .cancellation import CancellationToken
 
 class CommandExecutor:
     @staticmethod
-    def execute_command(command: str, timeout: int = 30) -> Tuple[str, Optional[str]]:
+    def execute_command(command: str, timeout: int = 30,
+                        cancel_token: Optional[CancellationToken] = None) -> Tuple[str, Optional[str]]:
+        with tracing.span("command.execute", cat="subprocess", command=command[:80]):
+            return CommandExecutor._execute(command, timeout, cancel_token)
+
+    @staticmethod
+    def _execute(command: str, timeout: int,
+                 cancel_token: Optional[CancellationToken]) -> Tuple[str, Optional[str]]:
         try:
-            result = subprocess.run(
+            # Own process group, so cancelling or timing out also kills the shell's children
+            process = subprocess.Popen(
                 command,
                 shell=True,
-                capture_output=True,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
                 text=True,
-                timeout=timeout
+                start_new_session=True
             )
-            return result.stdout, result.stderr
+        except Exception as e:
+            return "", str(e)
+
+        def kill():
+            try:
+                os.killpg(process.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+
+        unregister = cancel_token.on_cancel(kill) if cancel_token else (lambda: None)
+        try:
+            stdout, stderr = process.communicate(timeout=timeout)
         except subprocess.TimeoutExpired:
+            kill()
+            process.communicate()
             return "", "Command timed out"
         except Exception as e:
-            return "", str(e)
\ No newline at end of file
+            kill()
+            return "", str(e)
+        finally:
+            unregister()
+
+        if cancel_token and cancel_token.cancelled:
+            return stdout, "Command cancelled"
+        return stdout, stderr
+
+
+class BashSession:
+    """A long-lived bash process, so cd, exports and variables carry over between commands.
+
+    Same interface as CommandExecutor. A timeout or cancel kills the shell and
+    everything it started; the next command gets a fresh shell. A wrapper,
+    e.g. a sandbox command, is put in front of the shell when it starts.
+    """
+
+    def __init__(self, shell: str = "/bin/bash", cwd: Optional[str] = None,
+                 env: Optional[Dict[str, str]] = None, wrapper: Optional[List[str]] = None):
+        self.shell = shell
+        self.cwd = cwd
+        self.env = env
+        self.wrapper = wrapper or []
+        self._process: Optional[subprocess.Popen] = None
+        self._lock = threading.Lock()
+
+    def _ensure_started(self) -> subprocess.Popen:
+        if self._process is None or self._process.poll() is not None:
+            self._process = subprocess.Popen(
+                [*self.wrapper, self.shell],
+                cwd=self.cwd,
+                env=self.env,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                start_new_session=True
+            )
+        return self._process
+
+    def _kill(self, process: subprocess.Popen) -> None:
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        process.wait()
+        if self._process is process:
+            self._process = None
+
+    @staticmethod
+    def _read_until(process: subprocess.Popen, marker: bytes,
+                    timeout: float) -> Tuple[bytes, bytes, bool]:
+        """Read stdout and stderr until both end with marker or the shell exits.
+
+        The flag is False when the shell went away before printing the marker.
+        """
+        buffers = {process.stdout: bytearray(), process.stderr: bytearray()}
+        deadline = time.monotonic() + timeout
+        with selectors.DefaultSelector() as selector:
+            for stream in buffers:
+                selector.register(stream, selectors.EVENT_READ)
+            while selector.get_map():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise subprocess.TimeoutExpired(process.args, timeout)
+                for key, _ in selector.select(remaining):
+                    data = os.read(key.fd, 65536)
+                    buffer = buffers[key.fileobj]
+                    buffer += data
+                    if not data or marker in buffer[-(len(data) + len(marker)):]:
+                        selector.unregister(key.fileobj)
+        stdout, stderr = (bytes(buffers[stream]) for stream in (process.stdout, process.stderr))
+        return stdout.split(marker)[0], stderr.split(marker)[0], marker in stdout
+
+    def execute_command(self, command: str, timeout: int = 30,
+                        cancel_token: Optional[CancellationToken] = None) -> Tuple[str, Optional[str]]:
+        with self._lock, tracing.span("bash_session.execute", cat="subprocess", command=command[:80]):
+            try:
+                process = self._ensure_started()
+            except Exception as e:
+                return "", str(e)
+
+            # eval keeps the command in this shell; the sentinel marks the end of its output
+            sentinel = f"__command_done_{uuid.uuid4().hex}__"
+            script = (f"eval {shlex.quote(command)} < /dev/null\n"
+                      f"printf '\\n%s\\n' {sentinel}\n"
+                      f"printf '\\n%s\\n' {sentinel} >&2\n")
+            marker = f"\n{sentinel}\n".encode()
+
+            unregister = (cancel_token.on_cancel(lambda: self._kill(process))
+                          if cancel_token else (lambda: None))
+            try:
+                process.stdin.write(script.encode('utf-8'))
+                process.stdin.flush()
+                stdout, stderr, finished = self._read_until(process, marker, timeout)
+            except subprocess.TimeoutExpired:
+                self._kill(process)
+                return "", "Command timed out"
+            except Exception as e:
+                self._kill(process)
+                return "", str(e)
+            finally:
+                unregister()
+
+            if not finished:
+                # Killed by a cancel, or the command ended the shell itself (e.g. exit)
+                self._kill(process)
+            stdout = stdout.decode('utf-8', errors='replace')
+            stderr = stderr.decode('utf-8', errors='replace')
+            if cancel_token and cancel_token.cancelled:
+                return stdout, "Command cancelled"
+            return stdout, stderr
+
+    def close(self) -> None:
+        """Kill the shell and anything still running in it"""
+        process = self._process
+        if process is not None:
+            self._kill(process)
@@ -0,0 +1,149 @@
+import base64
+import io
+import threading
+from typing import Any, Dict, Optional, Tuple
+from . import tracing
+from .cancellation import CancellationToken
+from .tools import ToolResult
+
+# Resolution advertised to the model in the computer tool schema
+DISPLAY_WIDTH = 1024
+DISPLAY_HEIGHT = 768
+
+# xdotool-style key names used by the model -> pyautogui names
+KEY_NAMES = {
+    "return": "enter",
+    "super": "command",
+    "cmd": "command",
+    "page_up": "pageup",
+    "page_down": "pagedown",
+    "escape": "esc",
+}
+
+
+class ScreenArbiter:
+    """Lets one owner at a time drive the mouse, keyboard and screen.
+
+    An owner keeps the screen from its first computer action until it
+    releases it, so two sessions never interleave clicks and keystrokes.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._owner = None
+
+    @property
+    def owner(self) -> Any:
+        return self._owner
+
+    def acquire(self, owner: Any, cancel_token: Optional[CancellationToken] = None) -> bool:
+        """Block until owner holds the screen; False if cancel_token fires first"""
+        with self._condition:
+            while self._owner is not None and self._owner is not owner:
+                if cancel_token and cancel_token.cancelled:
+                    return False
+                self._condition.wait(0.1)
+            self._owner = owner
+            return True
+
+    def release(self, owner: Any) -> None:
+        with self._condition:
+            if self._owner is owner:
+                self._owner = None
+                self._condition.notify_all()
+
+
+class Computer:
+    """Executes computer tool actions on the local display.
+
+    pyautogui and PIL are imported on first use so that importing the agent
+    engine never requires a GUI session.
+    """
+
+    def __init__(self, width: int = DISPLAY_WIDTH, height: int = DISPLAY_HEIGHT):
+        self.width = width
+        self.height = height
+
+    @staticmethod
+    def _gui():
+        import pyautogui
+        return pyautogui
+
+    def _to_screen(self, coordinate) -> Tuple[int, int]:
+        screen_width, screen_height = self._gui().size()
+        x, y = coordinate
+        return (round(x * screen_width / self.width), round(y * screen_height / self.height))
+
+    def _from_screen(self, x: int, y: int) -> Tuple[int, int]:
+        screen_width, screen_height = self._gui().size()
+        return (round(x * self.width / screen_width), round(y * self.height / screen_height))
+
+    def screenshot(self) -> str:
+        """Screen capture scaled to the advertised resolution, as base64 PNG"""
+        from PIL import Image
+        with tracing.span("screenshot.capture", cat="screen"):
+            image = self._gui().screenshot()
+        with tracing.span("screenshot.resize", cat="screen", source=image.size):
+            image = image.resize((self.width, self.height), Image.Resampling.LANCZOS)
+        with tracing.span("screenshot.encode", cat="screen") as span:
+            buffer = io.BytesIO()
+            image.save(buffer, format="PNG")
+            encoded = base64.b64encode(buffer.getvalue()).decode('utf-8')
+            span.set(bytes=len(encoded))
+        return encoded
+
+    def run(self, tool_input: Dict) -> ToolResult:
+        action = tool_input.get("action")
+        gui = self._gui()
+        try:
+            if action == "screenshot":
+                return ToolResult(base64_image=self.screenshot())
+            if action == "cursor_position":
+                x, y = self._from_screen(*gui.position())
+                return ToolResult(output=f"X={x},Y={y}")
+            if action == "mouse_move":
+                gui.moveTo(*self._to_screen(tool_input["coordinate"]))
+            elif action == "left_click_drag":
+                gui.dragTo(*self._to_screen(tool_input["coordinate"]), button="left")
+            elif action == "left_click":
+                gui.click()
+            elif action == "right_click":
+                gui.rightClick()
+            elif action == "middle_click":
+                gui.middleClick()
+            elif action == "double_click":
+                gui.doubleClick()
+            elif action == "type":
+                gui.write(tool_input["text"], interval=0.01)
+            elif action == "key":
+                keys = [KEY_NAMES.get(key.lower(), key.lower())
+                        for key in tool_input["text"].split("+")]
+                gui.hotkey(*keys)
+            else:
+                return ToolResult(error=f"Unsupported computer action: {action}")
+        except (KeyError, TypeError, ValueError) as e:
+            return ToolResult(error=f"Invalid input for {action}: {e}")
+        return ToolResult(base64_image=self.screenshot())
+
+
+# 1x1 black PNG, returned as the "screen" by FakeComputer
+BLANK_PNG = ("iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAAAAAA6fptVAAAACklEQVR4nGNgAAAAAgABSK+kcQAAAABJRU5ErkJggg==")
+
+
+class FakeComputer(Computer):
+    """Computer that touches nothing: actions are recorded and every
+    screenshot is a blank image. Used for batch runs and benchmarks."""
+
+    def __init__(self, width: int = DISPLAY_WIDTH, height: int = DISPLAY_HEIGHT):
+        super().__init__(width, height)
+        self.actions = []
+
+    def screenshot(self) -> str:
+        return BLANK_PNG
+
+    def run(self, tool_input: Dict) -> ToolResult:
+        action = tool_input.get("action")
+        self.actions.append(dict(tool_input))
+        if action == "cursor_position":
+            return ToolResult(output="X=0,Y=0")
+        return ToolResult(base64_image=self.screenshot())
@@ -2,23 +2,26 @@ import json
 import os
 from datetime import datetime
 from typing import List, Dict
+from . import tracing
 
 class HistoryManager:
     def __init__(self, history_file: str):
+        # The file and its directory are created on first write, not at startup
         self.history_file = os.path.expanduser(history_file)
-        os.makedirs(os.path.dirname(self.history_file), exist_ok=True)
-
-        if not os.path.exists(self.history_file):
-            with open(self.history_file, 'w') as f:
-                json.dump([], f)
 
     def load_history(self) -> List[Dict]:
         try:
-            with open(self.history_file, 'r') as f:
+            with tracing.span("history.load", cat="io"), open(self.history_file, 'r') as f:
                 return json.load(f)
         except Exception:
             return []
 
+    def _write(self, history: List[Dict]) -> None:
+        os.makedirs(os.path.dirname(self.history_file), exist_ok=True)
+        with tracing.span("history.write", cat="io", entries=len(history)), \
+                open(self.history_file, 'w') as f:
+            json.dump(history, f, indent=2)
+
     def save_conversation(self, message: str, response: str) -> None:
         history = self.load_history()
         history.append({
@@ -26,9 +29,13 @@ class HistoryManager:
             'message': message,
             'response': response
         })
-        with open(self.history_file, 'w') as f:
-            json.dump(history, f, indent=2)
+        self._write(history)
 
     def clear_history(self) -> None:
-        with open(self.history_file, 'w') as f:
-            json.dump([], f)
+        self._write([])
+
+    def delete(self) -> None:
+        try:
+            os.remove(self.history_file)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,262 @@
+"""Macro cache: replay a repeated task's tool calls instead of asking the model.
+
+Opt in with ASSISTANT_MACROS set to a file path (or to 1 for the default
+file), or the CLI's --macros. Only tasks that start a conversation are
+recorded or replayed, since later ones depend on what came before. When
+such a task finishes cleanly, its computer and bash calls are saved under
+the normalized prompt, together with a perceptual hash (dHash) of the
+screen it started from and of the screenshot after each computer action,
+and a hash of each bash call's output. When the same prompt comes up on a
+similar screen, AgentEngine performs the saved calls itself. It compares
+each screenshot and output with the recording and hands the conversation
+to the model at the first mismatch, dropping the macro that failed. After
+the last call the model still writes the reply, from the fresh results.
+
+Without a display there is no start screen to key on, so headless hosts
+neither record nor replay. Lookups, hits, divergences and the time saved
+are counted in metrics.
+"""
+import base64
+import hashlib
+import io
+import json
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass, field, asdict
+from typing import Dict, List, Optional, Tuple
+from . import tracing
+from .metrics import metrics
+from .tools import ToolResult
+
+ENV_VAR = "ASSISTANT_MACROS"
+MACRO_TOOLS = ("computer", "bash")
+# Hashes up to this many bits apart (of 64) count as the same screen
+MATCH_DISTANCE = 10
+# Replays outrun the UI; a mismatched screenshot is retaken this often before giving up
+SETTLE_ATTEMPTS = 3
+SETTLE_DELAY = 0.5
+MAX_MACROS_PER_PROMPT = 4
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Case, spacing and trailing punctuation don't make a task different"""
+    return re.sub(r"\s+", " ", prompt).strip().rstrip(".!?").strip().lower()
+
+
+def dhash(base64_png: Optional[str]) -> Optional[int]:
+    """64-bit difference hash of a base64 image: one bit per pair of
+    horizontally adjacent pixels in a 9x8 grayscale thumbnail"""
+    if not base64_png:
+        return None
+    from PIL import Image
+    try:
+        image = Image.open(io.BytesIO(base64.b64decode(base64_png)))
+        pixels = list(image.convert("L").resize((9, 8), Image.Resampling.BOX).getdata())
+    except Exception:
+        return None
+    value = 0
+    for row in range(8):
+        for column in range(8):
+            left = pixels[row * 9 + column]
+            value = (value << 1) | (left > pixels[row * 9 + column + 1])
+    return value
+
+
+def screens_match(a: Optional[int], b: Optional[int]) -> bool:
+    """Whether two hashes are of similar screens; a missing hash matches nothing"""
+    if a is None or b is None:
+        return False
+    return bin(a ^ b).count("1") <= MATCH_DISTANCE
+
+
+def output_hash(text: str) -> str:
+    """Short digest of a tool call's text output"""
+    return hashlib.sha1(text.encode('utf-8', errors='replace')).hexdigest()[:16]
+
+
+def _hex(value: Optional[int]) -> Optional[str]:
+    return None if value is None else f"{value:016x}"
+
+
+def _int(value: Optional[str]) -> Optional[int]:
+    return None if value is None else int(value, 16)
+
+
+@dataclass
+class MacroStep:
+    tool: str
+    input: Dict
+    screen: Optional[int] = None  # hash of the screenshot the call returned, if any
+    output: Optional[str] = None  # output_hash of a bash call's output
+
+    def matches(self, result: ToolResult) -> bool:
+        """Whether a replayed call's result looks like the recorded one"""
+        if result.error and not result.output:
+            return False
+        if self.tool == "bash" and self.output != output_hash(result.output + result.error):
+            return False
+        return self.screen is None or screens_match(self.screen, dhash(result.base64_image))
+
+
+@dataclass
+class MacroTurn:
+    text: str
+    steps: List[MacroStep]
+
+
+@dataclass
+class Macro:
+    prompt: str  # normalized
+    screen: Optional[int]  # hash of the screen the task started on
+    display: Tuple[int, int]  # computer resolution the coordinates are in
+    turns: List[MacroTurn]
+    seconds: float  # how long the model took
+    created: float = field(default_factory=time.time)
+
+    def to_dict(self) -> Dict:
+        data = asdict(self)
+        data["screen"] = _hex(self.screen)
+        for turn in data["turns"]:
+            for step in turn["steps"]:
+                step["screen"] = _hex(step["screen"])
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Macro":
+        turns = [MacroTurn(turn["text"], [MacroStep(step["tool"], step["input"], _int(step["screen"]),
+                                                    step.get("output"))
+                                          for step in turn["steps"]])
+                 for turn in data["turns"]]
+        return cls(data["prompt"], _int(data["screen"]), tuple(data["display"]), turns,
+                   data["seconds"], data.get("created", 0))
+
+
+def macro_from_messages(prompt: str, screen: Optional[int], display: Tuple[int, int],
+                        messages: List[Dict], seconds: float) -> Optional[Macro]:
+    """Macro for a finished task's messages (the task, then each turn), or None
+    if the run called other tools, hit a tool error or called no tools at all"""
+    results = {}
+    for message in messages:
+        if message["role"] == "user" and not isinstance(message["content"], str):
+            for block in message["content"]:
+                if block.get("type") == "tool_result":
+                    results[block["tool_use_id"]] = block
+
+    turns = []
+    for message in messages[:-1]:
+        if message["role"] != "assistant":
+            continue
+        text = "".join(block["text"] for block in message["content"] if block["type"] == "text")
+        steps = []
+        for block in message["content"]:
+            if block["type"] != "tool_use":
+                continue
+            result = results.get(block["id"])
+            if block["name"] not in MACRO_TOOLS or result is None or result.get("is_error"):
+                return None
+            image = next((inner["source"]["data"] for inner in result.get("content", [])
+                          if inner.get("type") == "image"), None)
+            output = None
+            if block["name"] == "bash":
+                output = output_hash("".join(inner["text"] for inner in result.get("content", [])
+                                             if inner.get("type") == "text"))
+            steps.append(MacroStep(block["name"], block["input"], dhash(image), output))
+        turns.append(MacroTurn(text, steps))
+    if not any(turn.steps for turn in turns):
+        return None
+    return Macro(normalize_prompt(prompt), screen, tuple(display), turns, seconds)
+
+
+class MacroCache:
+    """Macros by normalized prompt, stored as JSON; shared by every engine"""
+
+    def __init__(self, path: str):
+        self.path = os.path.expanduser(path)
+        self._lock = threading.Lock()
+        self._macros: Dict[str, List[Macro]] = {}
+        try:
+            with open(self.path, 'r') as f:
+                for data in json.load(f):
+                    macro = Macro.from_dict(data)
+                    self._macros.setdefault(macro.prompt, []).append(macro)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"Error loading macros: {e}")
+
+    def _save(self) -> None:
+        data = [macro.to_dict() for macros in self._macros.values() for macro in macros]
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            temporary = self.path + ".tmp"
+            with open(temporary, 'w') as f:
+                json.dump(data, f, indent=2)
+            os.replace(temporary, self.path)
+        except Exception as e:
+            print(f"Error saving macros: {e}")
+
+    def lookup(self, prompt: str, screen: Optional[int]) -> Optional[Macro]:
+        """The newest macro for prompt recorded on a screen like this one"""
+        if screen is None:
+            return None
+        with self._lock:
+            candidates = [macro for macro in self._macros.get(normalize_prompt(prompt), [])
+                          if screens_match(macro.screen, screen)]
+        macro = max(candidates, key=lambda m: m.created, default=None)
+        metrics.increment("macros.lookups")
+        tracing.instant("macro.lookup", cat="macro", hit=macro is not None)
+        return macro
+
+    def record(self, macro: Macro) -> None:
+        """Store macro, replacing any for the same prompt and a similar start screen"""
+        if macro.screen is None:
+            return
+        with self._lock:
+            macros = [m for m in self._macros.get(macro.prompt, [])
+                      if not screens_match(m.screen, macro.screen)]
+            macros.append(macro)
+            self._macros[macro.prompt] = macros[-MAX_MACROS_PER_PROMPT:]
+            self._save()
+        metrics.increment("macros.recorded")
+
+    def forget(self, macro: Macro) -> None:
+        with self._lock:
+            macros = self._macros.get(macro.prompt, [])
+            if macro in macros:
+                macros.remove(macro)
+                self._save()
+
+    def replayed(self, macro: Macro, seconds: float) -> None:
+        """Count a replay whose task, reply included, finished in `seconds`"""
+        metrics.increment("macros.hits")
+        metrics.increment("macros.seconds_saved", max(0.0, macro.seconds - seconds))
+
+    def diverged(self, macro: Macro) -> None:
+        """Count and drop a macro whose replay stopped matching"""
+        metrics.increment("macros.diverged")
+        self.forget(macro)
+
+
+def summary() -> Optional[str]:
+    """Hit rate and time saved so far, or None if no lookups were made"""
+    lookups = metrics.get("macros.lookups")
+    if not lookups:
+        return None
+    hits = metrics.get("macros.hits")
+    return (f"Macros: {hits} of {lookups} tasks replayed ({hits / lookups:.0%}), "
+            f"{metrics.get('macros.diverged')} diverged, "
+            f"{metrics.get('macros.seconds_saved'):.1f}s saved")
+
+
+def cache_from_env(default_path: Optional[str] = None) -> Optional[MacroCache]:
+    """A cache if ASSISTANT_MACROS is set: a file path, or 1 for default_path"""
+    value = os.getenv(ENV_VAR, "")
+    if value.lower() in ("", "0", "false", "no"):
+        return None
+    if value.lower() in ("1", "true", "yes"):
+        if not default_path:
+            return None
+        value = default_path
+    return MacroCache(value)
@@ -0,0 +1,42 @@
+"""Process-wide counters for features that report how well they are doing.
+
+Counters live in memory and are safe to bump from any thread. Values may
+be counts or accumulated seconds; the tray's "Show Metrics" item and the
+CLI print them with summary().
+"""
+import threading
+from typing import Dict
+
+
+class Metrics:
+    def __init__(self):
+        self._values: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def increment(self, name: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[name] = self._values.get(name, 0) + amount
+
+    def get(self, name: str) -> float:
+        with self._lock:
+            return self._values.get(name, 0)
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            return dict(self._values)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+    def summary(self) -> str:
+        """One "name: value" line per counter, sorted by name"""
+        values = self.snapshot()
+        if not values:
+            return "No metrics recorded"
+        return "\n".join(f"{name}: {value}" if isinstance(value, int) else f"{name}: {value:.2f}"
+                         for name, value in sorted(values.items()))
+
+
+metrics = Metrics()
+increment = metrics.increment
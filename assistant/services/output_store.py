@@ -0,0 +1,151 @@
+import os
+import shutil
+import tempfile
+import uuid
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+# Outputs up to this size stay in memory; anything larger is spilled to disk
+INLINE_LIMIT = 64 * 1024
+PAGE_SIZE = 64 * 1024
+HEAD_LINES = 10
+TAIL_LINES = 3
+# Preview lines are cut to this many bytes; they are elided to the view's width anyway
+PREVIEW_LINE_BYTES = 512
+# Shown in place of a spilled output whose file was deleted, e.g. by "Clear History"
+UNAVAILABLE = "(output no longer available)"
+
+
+@dataclass
+class StoredOutput:
+    """Handle to a command output plus the little that is needed to preview it"""
+    size: int
+    line_count: int
+    head: List[str]
+    tail: List[str]
+    text: Optional[str] = field(default=None, repr=False)
+    path: Optional[str] = None
+
+    def read(self) -> str:
+        """Full output, loaded from disk if it was spilled"""
+        if self.text is not None:
+            return self.text
+        try:
+            with open(self.path, 'rb') as f:
+                return f.read().decode('utf-8', errors='replace')
+        except OSError:
+            return UNAVAILABLE
+
+    def read_chunk(self, offset: int, size: int = PAGE_SIZE) -> Tuple[str, int]:
+        """Read roughly size bytes from offset, ending on a line break when possible.
+
+        Returns the text and the offset of the next chunk; the offset equals
+        self.size once the end has been reached.
+        """
+        if self.text is not None:
+            data = self.text.encode('utf-8')
+            chunk = data[offset:offset + size]
+        else:
+            try:
+                with open(self.path, 'rb') as f:
+                    f.seek(offset)
+                    chunk = f.read(size)
+            except OSError:
+                return UNAVAILABLE, self.size
+
+        if offset + len(chunk) < self.size:
+            cut = chunk.rfind(b'\n')
+            if cut >= 0:
+                chunk = chunk[:cut + 1]
+            else:
+                # No line break in the page; don't split a multi-byte character
+                cut = len(chunk)
+                while cut > 0 and chunk[cut - 1] & 0xC0 == 0x80:
+                    cut -= 1
+                if cut > 0 and chunk[cut - 1] >= 0xC0:
+                    cut -= 1
+                chunk = chunk[:cut or len(chunk)]
+        return chunk.decode('utf-8', errors='replace'), offset + len(chunk)
+
+
+def count_lines(data: bytes) -> int:
+    """Line count from a single byte scan, without splitting the text"""
+    if not data:
+        return 0
+    return data.count(b'\n') + (0 if data.endswith(b'\n') else 1)
+
+
+def _preview_line(data: bytes, start: int, end: int) -> str:
+    """data[start:end] decoded, cut to PREVIEW_LINE_BYTES so one huge line stays small"""
+    if end - start > PREVIEW_LINE_BYTES:
+        # "ignore" drops a character split by the cut
+        line = data[start:start + PREVIEW_LINE_BYTES].decode('utf-8', errors='ignore') + "…"
+    else:
+        line = data[start:end].decode('utf-8', errors='replace')
+    return line.rstrip('\r')
+
+
+def _head(data: bytes, lines: int) -> List[str]:
+    result = []
+    start = 0
+    while len(result) < lines and start < len(data):
+        end = data.find(b'\n', start)
+        if end < 0:
+            end = len(data)
+        result.append(_preview_line(data, start, end))
+        start = end + 1
+    return result
+
+
+def _tail(data: bytes, lines: int) -> List[str]:
+    end = len(data) - 1 if data.endswith(b'\n') else len(data)
+    result = []
+    while len(result) < lines:
+        start = data.rfind(b'\n', 0, end) + 1
+        result.append(_preview_line(data, start, end))
+        if start == 0:
+            break
+        end = start - 1
+    return result[::-1]
+
+
+class OutputStore:
+    """Keeps command outputs out of the UI, spilling large ones to files"""
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = os.path.expanduser(directory) if directory else None
+
+    def _ensure_directory(self) -> str:
+        if self.directory is None:
+            self.directory = tempfile.mkdtemp(prefix="assistant-output-")
+        os.makedirs(self.directory, exist_ok=True)
+        return self.directory
+
+    def put(self, output: str) -> StoredOutput:
+        data = output.encode('utf-8', errors='replace')
+        line_count = count_lines(data)
+        stored = StoredOutput(
+            size=len(data),
+            line_count=line_count,
+            head=_head(data, HEAD_LINES),
+            tail=_tail(data, TAIL_LINES) if line_count > HEAD_LINES else [],
+        )
+        if len(data) <= INLINE_LIMIT:
+            stored.text = output
+        else:
+            stored.path = os.path.join(self._ensure_directory(), f"{uuid.uuid4().hex}.txt")
+            with open(stored.path, 'wb') as f:
+                f.write(data)
+        return stored
+
+    def discard(self, stored: StoredOutput) -> None:
+        """Delete a spilled output's file; the handle can't be read afterwards"""
+        if stored.path:
+            try:
+                os.remove(stored.path)
+            except OSError:
+                pass
+
+    def clear(self) -> None:
+        if self.directory and os.path.isdir(self.directory):
+            shutil.rmtree(self.directory, ignore_errors=True)
@@ -0,0 +1,56 @@
+import os
+from functools import cached_property
+from typing import Optional
+from .agent import AgentEngine
+from .api_client import AnthropicClient
+from .budget import BudgetTargets, RequestPlanner
+from .computer import Computer, ScreenArbiter
+from .macros import MacroCache, cache_from_env
+from .output_store import OutputStore
+from .session import Session, SessionManager
+
+
+class Services:
+    """Services shared by the app's windows, each constructed on first use"""
+
+    def __init__(self, history_file: str, output_dir: str, sessions_dir: str,
+                 budget_log: Optional[str] = None, macro_file: Optional[str] = None):
+        self.history_file = history_file
+        self.output_dir = output_dir
+        self.sessions_dir = sessions_dir
+        self.budget_log = budget_log
+        self.macro_file = macro_file
+
+    @cached_property
+    def session_manager(self) -> SessionManager:
+        return SessionManager(self.sessions_dir, self.history_file)
+
+    @cached_property
+    def output_store(self) -> OutputStore:
+        store = OutputStore(self.output_dir)
+        # Nothing in history points at outputs spilled by earlier runs
+        store.clear()
+        return store
+
+    @cached_property
+    def api_client(self) -> AnthropicClient:
+        return AnthropicClient(os.getenv('ANTHROPIC_API_KEY'))
+
+    @cached_property
+    def planner(self) -> RequestPlanner:
+        return RequestPlanner(BudgetTargets.from_env(), self.budget_log)
+
+    @cached_property
+    def macros(self) -> Optional[MacroCache]:
+        """Macro cache, or None unless ASSISTANT_MACROS opts in"""
+        return cache_from_env(self.macro_file)
+
+    @cached_property
+    def screen(self) -> ScreenArbiter:
+        return ScreenArbiter()
+
+    def make_engine(self, session: Session) -> AgentEngine:
+        """Engine for one session: shared client, planner, macros and screen; the session's own
+        shell and context. Each engine has its own Computer, whose resolution the planner sets."""
+        return AgentEngine(self.api_client, session.bash, Computer(), context=session.context,
+                           screen=self.screen, planner=self.planner, macros=self.macros)
@@ -0,0 +1,139 @@
+"""Offline stand-ins for AnthropicClient, used by batch runs and benchmarks.
+
+A script maps a task to the model turns played back for it. Each turn is a
+list of steps, either text or a tool call:
+
+    {"task": "list my files", "turns": [
+        [{"text": "Listing them."}, {"tool": "bash", "input": {"command": "ls"}}],
+        [{"text": "You have 3 files."}]
+    ]}
+
+Script files are JSONL, one task per line. RecordingClient writes the same
+format from live responses, so a real run can be replayed offline later.
+"""
+import json
+import threading
+from typing import Dict, Generator, List, Optional, Sequence, Tuple, Union
+from .api_client import ALL_TOOLS, DEFAULT_MAX_TOKENS, APIResponse
+from .computer import DISPLAY_HEIGHT, DISPLAY_WIDTH
+from .cancellation import CancellationToken
+
+Turn = List[Dict]
+
+
+def _position(messages: List[Dict]) -> Tuple[str, int]:
+    """The task being worked on (the latest plain-text user message) and
+    how many assistant turns it has had so far"""
+    for index in range(len(messages) - 1, -1, -1):
+        message = messages[index]
+        if message["role"] == "user" and isinstance(message["content"], str):
+            turn = sum(1 for m in messages[index + 1:] if m["role"] == "assistant")
+            return message["content"], turn
+    raise ValueError("No task message in the conversation")
+
+
+def _as_messages(message: Union[str, List[Dict]]) -> List[Dict]:
+    if isinstance(message, str):
+        return [{"role": "user", "content": message}]
+    return message
+
+
+class ScriptedClient:
+    """Plays back scripted turns instead of calling the API.
+
+    Tasks without a script use the default turns if given; otherwise, like a
+    script that runs out of turns, the stream raises ValueError.
+    """
+
+    def __init__(self, scripts: Dict[str, List[Turn]], default: Optional[List[Turn]] = None):
+        self.scripts = scripts
+        self.default = default
+
+    @classmethod
+    def load(cls, path: str) -> "ScriptedClient":
+        scripts = {}
+        default = None
+        with open(path, 'r') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                if entry.get("default"):
+                    default = entry["turns"]
+                else:
+                    scripts[entry["task"]] = entry["turns"]
+        return cls(scripts, default)
+
+    def stream_response(self, message: Union[str, List[Dict]],
+                        cancel_token: Optional[CancellationToken] = None,
+                        tools: Sequence[str] = ALL_TOOLS,
+                        display: Tuple[int, int] = (DISPLAY_WIDTH, DISPLAY_HEIGHT),
+                        max_tokens: int = DEFAULT_MAX_TOKENS
+                        ) -> Generator[APIResponse, None, None]:
+        task, turn = _position(_as_messages(message))
+        turns = self.scripts.get(task, self.default)
+        if turns is None:
+            raise ValueError(f"No script for task {task!r}")
+        if turn >= len(turns):
+            raise ValueError(f"Script for task {task!r} ended after {len(turns)} turns")
+
+        stop_reason = "end_turn"
+        for index, step in enumerate(turns[turn]):
+            if cancel_token and cancel_token.cancelled:
+                stop_reason = "cancelled"
+                break
+            if "text" in step:
+                yield APIResponse(step["text"], None, None)
+            elif "tool" in step:
+                stop_reason = "tool_use"
+                yield APIResponse(None, step["tool"], json.dumps(step.get("input", {})),
+                                  tool_id=f"toolu_scripted_{turn}_{index}")
+        yield APIResponse(None, None, None, stop_reason=stop_reason)
+
+
+class RecordingClient:
+    """Wraps a live client and records each completed turn as a script; call save() when done"""
+
+    def __init__(self, client, path: str):
+        self.client = client
+        self.path = path
+        self.recordings: Dict[str, List[Turn]] = {}
+        self._lock = threading.Lock()
+
+    def stream_response(self, message: Union[str, List[Dict]],
+                        cancel_token: Optional[CancellationToken] = None,
+                        tools: Sequence[str] = ALL_TOOLS,
+                        display: Tuple[int, int] = (DISPLAY_WIDTH, DISPLAY_HEIGHT),
+                        max_tokens: int = DEFAULT_MAX_TOKENS
+                        ) -> Generator[APIResponse, None, None]:
+        messages = _as_messages(message)
+        task, turn = _position(messages)
+        steps: Turn = []
+        stop_reason = None
+        for response in self.client.stream_response(messages, cancel_token, tools, display,
+                                                    max_tokens):
+            if response.text:
+                if steps and "text" in steps[-1]:
+                    steps[-1]["text"] += response.text
+                else:
+                    steps.append({"text": response.text})
+            if response.tool:
+                try:
+                    tool_input = json.loads(response.command or "{}")
+                except json.JSONDecodeError:
+                    tool_input = {}
+                steps.append({"tool": response.tool, "input": tool_input})
+            stop_reason = response.stop_reason or stop_reason
+            yield response
+
+        if stop_reason != "cancelled":
+            with self._lock:
+                turns = self.recordings.setdefault(task, [])
+                del turns[turn:]
+                turns.append(steps)
+
+    def save(self) -> None:
+        with self._lock:
+            with open(self.path, 'w') as f:
+                for task, turns in self.recordings.items():
+                    f.write(json.dumps({"task": task, "turns": turns}) + "\n")
@@ -0,0 +1,97 @@
+import json
+import os
+import uuid
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+from .command_executor import BashSession
+from .history_manager import HistoryManager
+
+DEFAULT_SESSION_ID = "default"
+
+
+@dataclass
+class Session:
+    """One conversation: its own model context, shell and history file"""
+    id: str
+    title: str
+    history_manager: HistoryManager
+    bash: BashSession = field(default_factory=BashSession)
+    context: List[Dict] = field(default_factory=list)  # messages sent to the model
+
+    def close(self) -> None:
+        self.bash.close()
+
+
+class SessionManager:
+    """Creates, restores and closes sessions, listed in an index file.
+
+    The default session keeps the original history file, so history from
+    before sessions existed shows up in the first tab. Closing a session
+    archives it: it leaves the index's open sessions but its history file
+    is kept until "Clear History".
+    """
+
+    def __init__(self, directory: str, default_history_file: str):
+        self.directory = os.path.expanduser(directory)
+        self.default_history_file = default_history_file
+        self.index_file = os.path.join(self.directory, "sessions.json")
+        self._sessions: Optional[List[Session]] = None
+        self._archived: List[Dict] = []  # index entries of closed sessions
+
+    def _make(self, session_id: str, title: str) -> Session:
+        if session_id == DEFAULT_SESSION_ID:
+            history_file = self.default_history_file
+        else:
+            history_file = os.path.join(self.directory, f"{session_id}.json")
+        return Session(session_id, title, HistoryManager(history_file))
+
+    def _save_index(self) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self.index_file, 'w') as f:
+            json.dump([{'id': s.id, 'title': s.title} for s in self._sessions] + self._archived,
+                      f, indent=2)
+
+    def sessions(self) -> List[Session]:
+        if self._sessions is None:
+            try:
+                with open(self.index_file, 'r') as f:
+                    entries = json.load(f)
+            except Exception:
+                entries = []
+            self._sessions = [self._make(entry['id'], entry['title'])
+                              for entry in entries if not entry.get('archived')]
+            self._archived = [entry for entry in entries if entry.get('archived')]
+            if not self._sessions:
+                # Reopens the default history if that session was archived
+                self._sessions = [self._make(DEFAULT_SESSION_ID, "Chat 1")]
+                self._archived = [entry for entry in self._archived
+                                  if entry['id'] != DEFAULT_SESSION_ID]
+        return list(self._sessions)
+
+    def create(self, title: Optional[str] = None) -> Session:
+        count = len(self.sessions())
+        session = self._make(uuid.uuid4().hex[:8], title or f"Chat {count + 1}")
+        self._sessions.append(session)
+        self._save_index()
+        return session
+
+    def close(self, session: Session) -> None:
+        """Stop the session's shell and archive it; its history file is kept"""
+        session.close()
+        self._sessions.remove(session)
+        self._archived.append({'id': session.id, 'title': session.title, 'archived': True})
+        self._save_index()
+
+    def clear_history(self) -> None:
+        """Empty every open session's history and delete the archived ones"""
+        for session in self.sessions():
+            session.history_manager.clear_history()
+        for entry in self._archived:
+            self._make(entry['id'], entry['title']).history_manager.delete()
+        if self._archived:
+            self._archived = []
+            self._save_index()
+
+    def shutdown(self) -> None:
+        for session in self._sessions or []:
+            session.close()
@@ -0,0 +1,30 @@
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+
+@dataclass
+class ToolResult:
+    output: str = ""
+    error: str = ""
+    base64_image: Optional[str] = None
+
+    def to_content(self, tool_use_id: str) -> Dict:
+        """tool_result block sent back to the model"""
+        content = []
+        if self.output or self.error:
+            content.append({"type": "text", "text": self.output + self.error})
+        if self.base64_image:
+            content.append({
+                "type": "image",
+                "source": {
+                    "type": "base64",
+                    "media_type": "image/png",
+                    "data": self.base64_image
+                }
+            })
+        return {
+            "type": "tool_result",
+            "tool_use_id": tool_use_id,
+            "content": content,
+            "is_error": bool(self.error) and not self.output
+        }
@@ -0,0 +1,192 @@
+"""Span tracing exported as Chrome trace-event JSON.
+
+Open the written file in https://ui.perfetto.dev or chrome://tracing to
+see one agent step across threads: the HTTP stream and tool calls on a
+session's worker, signal delivery to the Qt main thread (drawn as flow
+arrows), and the UI work that follows.
+
+Tracing is off by default. Set ASSISTANT_TRACE to a file path (or to 1 for
+a timestamped file in the default directory) to trace a whole run, or use
+the tray's "Toggle Tracing" item. While off, span() returns a shared no-op
+object, so instrumented code pays for one attribute check per call.
+"""
+import atexit
+import functools
+import itertools
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Any, Dict, List, Optional
+
+ENV_VAR = "ASSISTANT_TRACE"
+# Recording stops at this many events so a forgotten trace can't eat all memory
+MAX_EVENTS = 1_000_000
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **args) -> None:
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("tracer", "name", "cat", "args", "start")
+
+    def __init__(self, tracer: "Tracer", name: str, cat: str, args: Dict[str, Any]):
+        self.tracer = tracer
+        self.name = name
+        self.cat = cat
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter_ns()
+        self.tracer._record({"ph": "X", "name": self.name, "cat": self.cat,
+                             "ts": self.start / 1000, "dur": (end - self.start) / 1000,
+                             "args": self.args})
+        return False
+
+    def set(self, **args) -> None:
+        """Attach values only known once the span's work is done"""
+        self.args.update(args)
+
+
+class Tracer:
+    """Collects spans, instants and cross-thread flows in memory until stop()"""
+
+    def __init__(self):
+        self.enabled = False
+        self.path: Optional[str] = None
+        self._events: List[Dict] = []
+        self._threads: Dict[int, str] = {}
+        self._flows = defaultdict(deque)
+        self._flow_ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._exit_hook = False
+
+    def start(self, path: str) -> None:
+        with self._lock:
+            self.path = os.path.expanduser(path)
+            self._events = []
+            self._threads = {}
+            self._flows.clear()
+            self.enabled = True
+            if not self._exit_hook:
+                # CLI runs and crashes still leave a trace behind
+                atexit.register(self.stop)
+                self._exit_hook = True
+
+    def stop(self) -> Optional[str]:
+        """Stop recording and write the trace; returns its path"""
+        with self._lock:
+            if not self.enabled:
+                return None
+            self.enabled = False
+            events, self._events = self._events, []
+            threads = dict(self._threads)
+        pid = os.getpid()
+        metadata = [{"ph": "M", "name": "thread_name", "pid": pid, "tid": tid,
+                     "args": {"name": name}} for tid, name in threads.items()]
+        for event in events:
+            event["pid"] = pid
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, 'w') as f:
+                json.dump({"traceEvents": metadata + events, "displayTimeUnit": "ms"}, f)
+        except Exception as e:
+            print(f"Error writing trace: {e}")
+            return None
+        return self.path
+
+    def _record(self, event: Dict) -> None:
+        if not self.enabled or len(self._events) >= MAX_EVENTS:
+            return
+        tid = threading.get_ident()
+        if tid not in self._threads:
+            self._threads[tid] = threading.current_thread().name
+        event["tid"] = tid
+        self._events.append(event)
+
+    def span(self, name: str, cat: str = "app", **args):
+        """Context manager timing the enclosed block on the current thread"""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, cat, args)
+
+    def instant(self, name: str, cat: str = "app", **args) -> None:
+        if self.enabled:
+            self._record({"ph": "i", "s": "t", "name": name, "cat": cat,
+                          "ts": time.perf_counter_ns() / 1000, "args": args})
+
+    def flow_out(self, name: str, source: Any) -> None:
+        """Mark a queued signal being emitted; pair with flow_in() in its slot.
+
+        Queued signals from one sender arrive in emission order, so flows
+        are matched first in, first out per (name, sender).
+        """
+        if not self.enabled:
+            return
+        flow_id = next(self._flow_ids)
+        self._flows[(name, id(source))].append(flow_id)
+        self._record({"ph": "s", "name": name, "cat": "signal", "id": flow_id,
+                      "ts": time.perf_counter_ns() / 1000})
+
+    def flow_in(self, name: str, source: Any) -> None:
+        """Mark the slot for a flow_out(); call it inside the slot's span"""
+        if not self.enabled:
+            return
+        pending = self._flows.get((name, id(source)))
+        if not pending:
+            return
+        self._record({"ph": "f", "bp": "e", "name": name, "cat": "signal", "id": pending.popleft(),
+                      "ts": time.perf_counter_ns() / 1000})
+
+
+tracer = Tracer()
+span = tracer.span
+instant = tracer.instant
+flow_out = tracer.flow_out
+flow_in = tracer.flow_in
+
+
+def traced(name: str, cat: str = "app"):
+    """Decorator form of span() for timing a whole function or method"""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not tracer.enabled:
+                return fn(*args, **kwargs)
+            with _Span(tracer, name, cat, {}):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def default_trace_path(directory: str) -> str:
+    return os.path.join(os.path.expanduser(directory),
+                        time.strftime("trace-%Y%m%d-%H%M%S.json"))
+
+
+def configure_from_env(default_directory: str) -> None:
+    """Start tracing if ASSISTANT_TRACE is set: a file path, or 1 for default_directory"""
+    value = os.getenv(ENV_VAR, "")
+    if value.lower() in ("", "0", "false", "no"):
+        return
+    if value.lower() in ("1", "true", "yes"):
+        value = default_trace_path(default_directory)
+    tracer.start(value)
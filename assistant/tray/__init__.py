@@ -0,0 +1,26 @@
+import importlib.util
+import os
+import sys
+from typing import Optional
+from .base import TrayBackend
+
+BACKENDS = ("rumps", "qt")
+
+
+def default_backend() -> str:
+    """rumps on macOS when it is installed, the Qt-only tray everywhere else"""
+    if sys.platform == "darwin" and importlib.util.find_spec("rumps") is not None:
+        return "rumps"
+    return "qt"
+
+
+def create_tray(title: str, icon_path: str, backend: Optional[str] = None) -> TrayBackend:
+    """Build the tray front end named by backend or $ASSISTANT_TRAY"""
+    backend = backend or os.getenv("ASSISTANT_TRAY") or default_backend()
+    if backend == "rumps":
+        from .rumps_tray import RumpsTray
+        return RumpsTray(title, icon_path)
+    if backend == "qt":
+        from .qt_tray import QtTray
+        return QtTray(title, icon_path)
+    raise ValueError(f"Unknown tray backend {backend!r}; expected one of {', '.join(BACKENDS)}")
@@ -0,0 +1,44 @@
+from typing import Callable, List
+
+
+class TrayBackend:
+    """Menu-bar / tray front end sharing the application's single event loop.
+
+    A backend owns the menu and runs the one loop that also dispatches Qt
+    events, timers and cross-thread signals, so nothing has to poll Qt.
+    """
+    name = ""
+
+    def __init__(self, title: str, icon_path: str):
+        self.title = title
+        self.icon_path = icon_path
+        self._quit_handlers: List[Callable[[], None]] = []
+        self._quitting = False
+
+    def add_action(self, title: str, callback: Callable[[], None]) -> None:
+        raise NotImplementedError
+
+    def run(self, qt_app) -> int:
+        """Run the shared event loop until quit() is called"""
+        raise NotImplementedError
+
+    def quit(self) -> None:
+        raise NotImplementedError
+
+    def show_message(self, title: str, message: str) -> None:
+        """Show message to the user in a dialog; the app may be running with no window"""
+        raise NotImplementedError
+
+    def on_quit(self, callback: Callable[[], None]) -> None:
+        """Run callback once before the app quits, however the quit was triggered"""
+        self._quit_handlers.append(callback)
+
+    def _before_quit(self) -> None:
+        if self._quitting:
+            return
+        self._quitting = True
+        for callback in self._quit_handlers:
+            try:
+                callback()
+            except Exception as e:
+                print(f"Error during quit: {e}")
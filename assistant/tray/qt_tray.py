@@ -0,0 +1,41 @@
+from typing import Callable
+from PyQt6.QtWidgets import QApplication, QMenu, QMessageBox, QSystemTrayIcon
+from PyQt6.QtGui import QAction, QIcon
+from .base import TrayBackend
+
+
+class QtTray(TrayBackend):
+    """Tray icon implemented with Qt alone; QApplication.exec() is the only loop"""
+    name = "qt"
+
+    def __init__(self, title: str, icon_path: str):
+        super().__init__(title, icon_path)
+        self.menu = QMenu()
+        self.icon = QSystemTrayIcon(QIcon(icon_path))
+        self.icon.setToolTip(title)
+        self.icon.setContextMenu(self.menu)
+
+    def add_action(self, title: str, callback: Callable[[], None]) -> None:
+        action = QAction(title, self.menu)
+        action.triggered.connect(lambda _checked=False: callback())
+        self.menu.addAction(action)
+
+    def run(self, qt_app) -> int:
+        # The chat window hides on close; only the tray's Quit ends the app
+        qt_app.setQuitOnLastWindowClosed(False)
+        qt_app.aboutToQuit.connect(self._before_quit)
+        self.menu.addSeparator()
+        self.add_action("Quit", self.quit)
+        if QSystemTrayIcon.isSystemTrayAvailable():
+            self.icon.show()
+        else:
+            print("System tray unavailable; running without a tray icon")
+        return qt_app.exec()
+
+    def quit(self) -> None:
+        self._before_quit()
+        self.icon.hide()
+        QApplication.quit()
+
+    def show_message(self, title: str, message: str) -> None:
+        QMessageBox.information(None, title, message)
@@ -0,0 +1,38 @@
+from typing import Callable
+import rumps
+from .base import TrayBackend
+
+
+class RumpsTray(TrayBackend):
+    """macOS menu-bar item via rumps.
+
+    rumps runs the Cocoa run loop. Qt's Cocoa event dispatcher attaches its
+    posted-event source and timers to that same main CFRunLoop, so Qt events
+    and queued signals are delivered as they arrive instead of being pumped
+    by a polling timer.
+    """
+    name = "rumps"
+
+    def __init__(self, title: str, icon_path: str):
+        super().__init__(title, icon_path)
+        self.app = rumps.App(title, icon=icon_path, quit_button=None)
+
+    def add_action(self, title: str, callback: Callable[[], None]) -> None:
+        self.app.menu.add(rumps.MenuItem(title, callback=lambda _: callback()))
+
+    def run(self, qt_app) -> int:
+        qt_app.setQuitOnLastWindowClosed(False)
+        # QApplication.exec() never runs, so aboutToQuit is never emitted; quitting
+        # from the menu bar or the system goes through applicationWillTerminate
+        rumps.events.before_quit.register(self._before_quit)
+        self.app.menu.add(rumps.separator)
+        self.add_action("Quit", self.quit)
+        self.app.run()
+        return 0
+
+    def quit(self) -> None:
+        self._before_quit()
+        rumps.quit_application()
+
+    def show_message(self, title: str, message: str) -> None:
+        rumps.alert(title, message)
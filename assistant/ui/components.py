@@ -1,303 +1,213 @@
-import os
 from datetime import datetime
-from PyQt6.QtWidgets import (QTextEdit, QWidget, QVBoxLayout, QHBoxLayout,
-                           QLabel, QPushButton, QFrame, QScrollArea)
-from PyQt6.QtCore import Qt, QSize, QRectF, pyqtSignal
-from PyQt6.QtGui import QFont, QPixmap, QPainter, QPainterPath, QColor, QBrush, QTextDocument, QKeyEvent
-from .styles import ChatStyles
-
-class StyledChatArea(QScrollArea):
-    def __init__(self):
+from typing import Union
+from PyQt6.QtWidgets import (QTextEdit, QPushButton, QFrame, QListView,
+                           QAbstractItemView, QApplication)
+from PyQt6.QtCore import Qt, QTimer, pyqtSignal
+from PyQt6.QtGui import QKeyEvent, QAction, QKeySequence
+from ..services import tracing
+from ..services.output_store import OutputStore, StoredOutput
+from . import resources
+from .output_viewer import CommandOutputViewer
+from .transcript import TranscriptModel, MessageDelegate, MessageItem
+
+FRAME_INTERVAL_MS = 16
+# Distance from the bottom that still counts as following the conversation
+PIN_THRESHOLD_PX = 8
+# Expanded output viewers further than this many screens away are released
+OUTPUT_RELEASE_SCREENS = 2
+
+class StyledChatArea(QListView):
+    """Virtualized transcript: only visible rows are painted, row heights are cached"""
+
+    def __init__(self, output_store: OutputStore = None):
         super().__init__()
-        self.setWidgetResizable(True)
+        self.setObjectName("chatArea")
+        self.output_store = output_store or OutputStore()
+        self.transcript = TranscriptModel(self)
+        self.setModel(self.transcript)
+        self.delegate = MessageDelegate(self)
+        self.setItemDelegate(self.delegate)
         self.setFrameShape(QFrame.Shape.NoFrame)
-
-        # Container widget
-        container = QWidget()
-        self.setWidget(container)
-        self.layout = QVBoxLayout(container)
-        self.layout.setSpacing(24)
-        self.layout.setContentsMargins(24, 24, 24, 24)
-
-        # Style the scroll area
-        self.setStyleSheet("""
-            QScrollArea {
-                background-color: #151518;
-                border: none;
-            }
-            QScrollBar:vertical {
-                border: none;
-                background: #27272A;
-                width: 8px;
-                margin: 0px;
-            }
-            QScrollBar::handle:vertical {
-                background: #3F3F46;
-                border-radius: 4px;
-                min-height: 20px;
-            }
-            QScrollBar::add-line:vertical, QScrollBar::sub-line:vertical {
-                border: none;
-                background: none;
-            }
-        """)
-
-        self.current_message = None
+        self.setVerticalScrollMode(QAbstractItemView.ScrollMode.ScrollPerPixel)
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        self.setSelectionMode(QAbstractItemView.SelectionMode.ExtendedSelection)
+        self.setEditTriggers(QAbstractItemView.EditTrigger.DoubleClicked)
+        self.setResizeMode(QListView.ResizeMode.Adjust)
+        self.setUniformItemSizes(False)
+        self.verticalScrollBar().setSingleStep(24)
+        self.setContextMenuPolicy(Qt.ContextMenuPolicy.ActionsContextMenu)
+
+        copy_action = QAction("Copy", self)
+        copy_action.setShortcut(QKeySequence.StandardKey.Copy)
+        copy_action.setShortcutContext(Qt.ShortcutContext.WidgetShortcut)
+        copy_action.triggered.connect(self.copy_selection)
+        self.addAction(copy_action)
+
+        self.current_row = None
+        self._scroll_pending = False
+
+        # Streamed deltas are buffered and flushed at most once per frame
+        self._pending_text = []
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setSingleShot(True)
+        self._flush_timer.setInterval(FRAME_INTERVAL_MS)
+        self._flush_timer.timeout.connect(self.flush_stream)
+
+        # Rows whose long command output is expanded into a paged viewer
+        self.expanded_rows = set()
+        self.verticalScrollBar().valueChanged.connect(self.sync_output_viewers)
 
     def scroll_to_bottom(self):
-        self.verticalScrollBar().setValue(self.verticalScrollBar().maximum())
-        self.widget().updateGeometry()
-
+        """Scroll once the pending layout has run, coalescing repeated calls"""
+        if not self._scroll_pending:
+            self._scroll_pending = True
+            QTimer.singleShot(0, self._do_scroll_to_bottom)
+
+    @tracing.traced("ui.scroll_to_bottom", cat="ui")
+    def _do_scroll_to_bottom(self):
+        self._scroll_pending = False
+        self.scrollToBottom()
+
+    def is_pinned_to_bottom(self) -> bool:
+        scrollbar = self.verticalScrollBar()
+        return scrollbar.value() >= scrollbar.maximum() - PIN_THRESHOLD_PX
+
+    def clear(self):
+        """Empty the transcript and delete the files of its spilled outputs"""
+        for item in self.transcript.items:
+            if item.command_output is not None:
+                self.output_store.discard(item.command_output)
+        self.expanded_rows = set()
+        self._pending_text = []
+        self._flush_timer.stop()
+        self.transcript.clear()
+        self.current_row = None
+
+    def append_stream(self, text: str):
+        """Queue a streamed text delta for the in-progress assistant message"""
+        self._pending_text.append(text)
+        if not self._flush_timer.isActive():
+            self._flush_timer.start()
+
+    @tracing.traced("ui.flush_stream", cat="ui")
+    def flush_stream(self):
+        """Apply all buffered deltas in a single append"""
+        self._flush_timer.stop()
+        if not self._pending_text:
+            return
+        text = "".join(self._pending_text)
+        self._pending_text = []
+        pinned = self.is_pinned_to_bottom()
+
+        if self.current_row is None:
+            self.current_row = self.transcript.append(MessageItem(
+                True, "", datetime.now().strftime("%I:%M %p · %b %d, %Y")
+            ))
+        self.transcript.append_text(self.current_row, text)
+
+        if pinned:
+            self.scroll_to_bottom()
+
+    def end_stream(self):
+        """Flush what is buffered and close the in-progress assistant message"""
+        self.flush_stream()
+        if self.current_row is not None:
+            self.transcript.finish_stream(self.current_row)
+        self.current_row = None
+
+    def copy_selection(self):
+        """Copy the selected messages, in transcript order"""
+        rows = sorted(index.row() for index in self.selectionModel().selectedIndexes())
+        if not rows:
+            return
+        items = self.transcript.items
+        text = "\n\n".join(
+            f"{'Assistant' if items[row].is_assistant else 'You'}: {items[row].plain_text()}"
+            for row in rows
+        )
+        QApplication.clipboard().setText(text)
+
+    def toggle_output(self, row: int):
+        item = self.transcript.items[row]
+        if not item.is_collapsible():
+            return
+        self.transcript.set_expanded(row, not item.expanded)
+        if item.expanded:
+            self.expanded_rows.add(row)
+        else:
+            self.expanded_rows.discard(row)
+            self.setIndexWidget(self.transcript.index(row), None)
+        self.doItemsLayout()
+        self.sync_output_viewers()
+
+    def sync_output_viewers(self):
+        """Open viewers for visible expanded rows; release those scrolled far away"""
+        viewport = self.viewport().rect()
+        margin = OUTPUT_RELEASE_SCREENS * viewport.height()
+        keep = viewport.adjusted(0, -margin, 0, margin)
+        for row in self.expanded_rows:
+            index = self.transcript.index(row)
+            rect = self.visualRect(index)
+            viewer = self.indexWidget(index)
+            if viewer is None and rect.intersects(viewport):
+                output = self.transcript.items[row].command_output
+                self.setIndexWidget(index, CommandOutputViewer(output))
+            elif viewer is not None and not rect.intersects(keep):
+                # Drops the paged-in text; it is reloaded from the store if scrolled back
+                self.setIndexWidget(index, None)
+
+    def paintEvent(self, event):
+        with tracing.span("ui.paint", cat="ui"):
+            super().paintEvent(event)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        if self.expanded_rows:
+            QTimer.singleShot(0, self.sync_output_viewers)
+
+    def mouseReleaseEvent(self, event):
+        index = self.indexAt(event.position().toPoint())
+        if index.isValid() and event.button() == Qt.MouseButton.LeftButton:
+            item = self.transcript.items[index.row()]
+            if item.is_collapsible():
+                box, _, _ = self.delegate.output_rects(item, self.visualRect(index))
+                if box.contains(event.position().toPoint()):
+                    self.toggle_output(index.row())
+        super().mouseReleaseEvent(event)
+
+    @tracing.traced("ui.append_message", cat="ui")
     def append_message(self, is_assistant: bool, message: str, timestamp: str = None,
-                      tool_name: str = None, command_output: str = None):
-
-        print("Debug: ", is_assistant, message, tool_name, command_output)
+                      tool_name: str = None,
+                      command_output: Union[str, StoredOutput, None] = None):
         """Add or update a message in the chat area"""
         if timestamp is None:
             timestamp = datetime.now().strftime("%I:%M %p · %b %d, %Y")
+        if isinstance(command_output, str):
+            command_output = self.output_store.put(command_output) if command_output else None
 
-        # For new messages
-        if not self.current_message or not is_assistant:
-            self.current_message = MessageWidget(is_assistant, message, timestamp, tool_name, command_output)
-            self.layout.addWidget(self.current_message)
-        # For updating existing assistant message
-        elif is_assistant:
-            if not tool_name and not command_output:
-                self.current_message.update_message(message)
-            else:
-                self.current_message = MessageWidget(is_assistant, message, timestamp, tool_name, command_output)
-                self.layout.addWidget(self.current_message)
-
-        # Reset current_message for non-assistant messages
-        if not is_assistant:
-            self.current_message = None
-
-        # Scroll to bottom
-        self.scroll_to_bottom()
-
-class CircularAvatarLabel(QLabel):
-    def __init__(self, is_assistant: bool, size: int = 38):
-        super().__init__()
-        self.setFixedSize(size, size)
-
-        # Create base pixmap
-        target = QPixmap(size, size)
-        target.fill(Qt.GlobalColor.transparent)
-
-        # Setup painter
-        painter = QPainter(target)
-        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
-
-        # Draw background circle
-        bg_color = QColor("#4F46E5") if is_assistant else QColor("#52525B")
-        painter.setBrush(QBrush(bg_color))
-        painter.setPen(Qt.PenStyle.NoPen)
-        painter.drawEllipse(0, 0, size, size)
-
-        # Load and process icon
-        icon_path = os.path.join(os.path.dirname(__file__),
-                               "assistant_icon.png" if is_assistant else "user_icon.png")
-        original_icon = QPixmap(icon_path)
-
-        # Calculate icon size (smaller than container)
-        icon_size = int(size * 0.6)  # Icon takes up 60% of the circle
-        icon_padding = (size - icon_size) // 2
-
-        # Scale icon
-        scaled_icon = original_icon.scaled(
-            icon_size,
-            icon_size,
-            Qt.AspectRatioMode.KeepAspectRatio,
-            Qt.TransformationMode.SmoothTransformation
-        )
-
-        # Draw the icon in the center
-        painter.drawPixmap(
-            icon_padding,
-            icon_padding,
-            scaled_icon
-        )
-
-        painter.end()
-
-        self.setPixmap(target)
-        self.setStyleSheet("""
-            QLabel {
-                background: transparent;
-            }
-        """)
+        pinned = self.is_pinned_to_bottom()
+        if self._pending_text:
+            self.flush_stream()
 
-class MessageWidget(QFrame):
-    def __init__(self, is_assistant: bool, message: str, timestamp: str = None,
-                 tool_name: str = None, command_output: str = None):
-        super().__init__()
-        self.is_assistant = is_assistant
-        self.setFrameShape(QFrame.Shape.NoFrame)
-        self.main_layout = QVBoxLayout(self)
-        self.main_layout.setSpacing(12)
-        self.main_layout.setContentsMargins(0, 0, 0, 0)
-
-        # Timestamp
-        if timestamp:
-            time_label = QLabel(timestamp)
-            time_label.setStyleSheet("""
-                QLabel {
-                    color: #71717A;
-                    font-size: 13px;
-                    font-weight: 400;
-                    font-family: 'SF Pro Display', -apple-system, BlinkMacSystemFont, sans-serif;
-                }
-            """)
-            self.main_layout.addWidget(time_label)
-
-        # Message container
-        message_container = QWidget()
-        message_layout = QHBoxLayout(message_container)
-        message_layout.setContentsMargins(0, 0, 0, 0)
-        message_layout.setSpacing(16)
-
-        # Avatar
-        avatar_label = CircularAvatarLabel(is_assistant)
-        message_layout.addWidget(avatar_label)
-
-        # Content container
-        content_widget = QWidget()
-        content_layout = QVBoxLayout(content_widget)
-        content_layout.setContentsMargins(0, 0, 0, 0)
-        content_layout.setSpacing(8)
-
-        # Role label
-        role_label = QLabel("Assistant" if is_assistant else "You")
-        role_label.setStyleSheet("""
-            QLabel {
-                color: #E4E4E7;
-                font-size: 15px;
-                font-weight: 600;
-                font-family: 'SF Pro Display', -apple-system, BlinkMacSystemFont, sans-serif;
-            }
-        """)
-        content_layout.addWidget(role_label)
-
-        # Message text
-        self.message_label = QLabel(message)
-        self.message_label.setTextInteractionFlags(
-            Qt.TextInteractionFlag.TextSelectableByMouse |
-            Qt.TextInteractionFlag.TextSelectableByKeyboard
-        )
-        self.message_label.setStyleSheet("""
-            QLabel {
-                color: #E4E4E7;
-                font-size: 15px;
-                line-height: 1.5;
-                font-family: 'SF Pro Display', -apple-system, BlinkMacSystemFont, sans-serif;
-                background: transparent;
-            }
-            QLabel::selected {
-                background-color: #4F46E5;
-                color: white;
-            }
-        """)
-        content_layout.addWidget(self.message_label)
-
-        # Tool use indication
-        if tool_name:
-            tool_widget = QWidget()
-            tool_layout = QHBoxLayout(tool_widget)
-            tool_layout.setContentsMargins(0, 8, 0, 8)
-
-            tool_icon = QLabel("🔧")
-            tool_icon.setFixedSize(16, 16)
-            tool_layout.addWidget(tool_icon)
-
-            tool_label = QLabel(f"Using {tool_name}")
-            tool_label.setStyleSheet("""
-                QLabel {
-                    color: #A1A1AA;
-                    font-size: 13px;
-                    font-family: 'SF Pro Display', -apple-system, BlinkMacSystemFont, sans-serif;
-                }
-            """)
-            tool_layout.addWidget(tool_label)
-            tool_layout.addStretch()
-            content_layout.addWidget(tool_widget)
-
-        message_layout.addWidget(content_widget)
-        message_layout.addStretch()
-        self.main_layout.addWidget(message_container)
-
-        # Add command output if provided
-        if command_output:
-            self.add_command_output(command_output)
-
-    def update_message(self, message: str):
-        """Update the message text"""
-        self.message_label.setText(message)
-
-    def add_command_output(self, command_output: str):
-        """Add command output to the message with conditional scrolling"""
-        # Create command output container
-        output_container = QWidget()
-        output_layout = QVBoxLayout(output_container)
-        output_layout.setContentsMargins(0, 8, 0, 0)
-
-        # Create a temporary QTextDocument to count lines
-        doc = QTextDocument()
-        doc.setPlainText(command_output)
-        line_count = doc.lineCount()
-
-        # Command output text area
-        output_text = QTextEdit()
-        output_text.setReadOnly(True)
-        output_text.setTextInteractionFlags(
-            Qt.TextInteractionFlag.TextSelectableByMouse |
-            Qt.TextInteractionFlag.TextSelectableByKeyboard
-        )
-        output_text.setFont(QFont("Menlo", 13))
+        # Updating the in-progress assistant message
+        if (is_assistant and self.current_row is not None and
+                not tool_name and not command_output):
+            self.transcript.update_message(self.current_row, message)
+        # For new messages
+        else:
+            if self.current_row is not None:
+                self.transcript.finish_stream(self.current_row)
+            self.current_row = self.transcript.append(
+                MessageItem(is_assistant, message, timestamp, tool_name, command_output)
+            )
 
-        # Calculate the height based on line count
-        line_height = output_text.fontMetrics().lineSpacing()
-        padding = 32  # 16px padding top + 16px padding bottom
+        # Reset current_row for non-assistant messages
+        if not is_assistant:
+            self.current_row = None
 
-        if line_count <= 10:
-            # For 10 lines or less, set fixed height with no scrolling
-            output_text.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
-            height = (line_height * line_count) + padding
-            output_text.setFixedHeight(height)
-        else:
-            # For more than 10 lines, set fixed height with scrolling
-            height = (line_height * 10) + padding
-            output_text.setFixedHeight(height)
-            output_text.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAsNeeded)
-
-        output_text.setStyleSheet("""
-            QTextEdit {
-                background-color: #27272A;
-                border: 1px solid #3F3F46;
-                border-radius: 6px;
-                padding: 16px;
-                color: #E4E4E7;
-                font-family: Menlo, Monaco, 'Courier New', monospace;
-            }
-            QScrollBar:vertical {
-                border: none;
-                background: #3F3F46;
-                width: 8px;
-                margin: 0px;
-            }
-            QScrollBar::handle:vertical {
-                background: #52525B;
-                border-radius: 4px;
-                min-height: 20px;
-            }
-            QScrollBar::add-line:vertical, QScrollBar::sub-line:vertical {
-                border: none;
-                background: none;
-            }
-        """)
-        output_text.setText(command_output)
-        output_layout.addWidget(output_text)
-
-        self.main_layout.addWidget(output_container)
+        # Follow the conversation unless the user has scrolled back through it
+        if pinned or not is_assistant:
+            self.scroll_to_bottom()
 
 class StyledInputField(QTextEdit):
     enterPressed = pyqtSignal()  # New signal for enter key
@@ -306,21 +216,8 @@ class StyledInputField(QTextEdit):
         super().__init__()
         self.setMinimumHeight(48)
         self.setMaximumHeight(96)
-        self.setFont(QFont("SF Pro Display", 15))  # Matching message font
-        self.setStyleSheet("""
-            QTextEdit {
-                border: 1px solid #3F3F46;
-                border-radius: 12px;
-                padding: 16px;
-                background-color: #27272A;
-                color: #E4E4E7;
-                font-family: 'SF Pro Display', -apple-system, BlinkMacSystemFont, sans-serif;
-            }
-            QTextEdit:focus {
-                border: 2px solid #4F46E5;
-                background-color: #27272A;
-            }
-        """)
+        self.setObjectName("messageInput")
+        self.setFont(resources.font("input"))
 
         self.setPlaceholderText("Message Claude...")
 
@@ -337,25 +234,18 @@ class StyledInputField(QTextEdit):
 class StyledSendButton(QPushButton):
     def __init__(self):
         super().__init__()
+        self.setObjectName("sendButton")
         self.setFixedSize(48, 48)  # Square button
         self.setCursor(Qt.CursorShape.PointingHandCursor)
         self.setEnabled(False)  # Initially disabled
-        self.setStyleSheet("""
-            QPushButton {
-                background-color: #4F46E5;
-                border: none;
-                border-radius: 8px;
-                color: white;
-                font-size: 20px;
-            }
-            QPushButton:hover {
-                background-color: #4338CA;
-            }
-            QPushButton:pressed {
-                background-color: #3730A3;
-            }
-            QPushButton:disabled {
-                background-color: #3F3F46;
-            }
-        """)
         self.setText("→")  # Arrow icon
+
+
+class StyledStopButton(QPushButton):
+    def __init__(self):
+        super().__init__()
+        self.setObjectName("stopButton")
+        self.setFixedSize(48, 48)
+        self.setCursor(Qt.CursorShape.PointingHandCursor)
+        self.setToolTip("Stop the running task and clear the queue")
+        self.setText("■")
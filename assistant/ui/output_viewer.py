@@ -0,0 +1,48 @@
+from PyQt6.QtWidgets import QPlainTextEdit
+from PyQt6.QtCore import Qt
+from PyQt6.QtGui import QTextCursor
+from ..services.output_store import StoredOutput
+from . import resources
+
+
+class CommandOutputViewer(QPlainTextEdit):
+    """Read-only output pane that pages text in from storage as it is scrolled"""
+
+    def __init__(self, output: StoredOutput, parent=None):
+        super().__init__(parent)
+        self.setObjectName("commandOutput")
+        self.output = output
+        self.offset = 0
+
+        self.setReadOnly(True)
+        self.setUndoRedoEnabled(False)
+        self.setLineWrapMode(QPlainTextEdit.LineWrapMode.NoWrap)
+        self.setTextInteractionFlags(
+            Qt.TextInteractionFlag.TextSelectableByMouse |
+            Qt.TextInteractionFlag.TextSelectableByKeyboard
+        )
+        self.setFont(resources.font("output"))
+        self.verticalScrollBar().valueChanged.connect(self._maybe_load_more)
+
+        self.load_next_page()
+
+    def at_end(self) -> bool:
+        return self.offset >= self.output.size
+
+    def load_next_page(self):
+        if self.at_end():
+            return
+        text, self.offset = self.output.read_chunk(self.offset)
+        if self.at_end() and text.endswith('\n'):
+            text = text[:-1]
+        scrollbar = self.verticalScrollBar()
+        value = scrollbar.value()
+        cursor = QTextCursor(self.document())
+        cursor.movePosition(QTextCursor.MoveOperation.End)
+        cursor.insertText(text)
+        scrollbar.setValue(value)
+
+    def _maybe_load_more(self, value: int):
+        scrollbar = self.verticalScrollBar()
+        if value >= scrollbar.maximum() - scrollbar.pageStep():
+            self.load_next_page()
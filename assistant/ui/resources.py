@@ -0,0 +1,89 @@
+import os
+from typing import Dict, Tuple
+from PyQt6.QtCore import Qt
+from PyQt6.QtGui import QBrush, QColor, QFont, QFontMetrics, QPainter, QPixmap
+
+ICON_DIR = os.path.dirname(__file__)
+UI_FAMILY = "SF Pro Display"
+MONO_FAMILY = "Menlo"
+
+# name -> (family, pixel size, weight)
+FONT_SPECS = {
+    "timestamp": (UI_FAMILY, 13, QFont.Weight.Normal),
+    "role": (UI_FAMILY, 15, QFont.Weight.DemiBold),
+    "message": (UI_FAMILY, 15, QFont.Weight.Normal),
+    "tool": (UI_FAMILY, 13, QFont.Weight.Normal),
+    "input": (UI_FAMILY, 15, QFont.Weight.Normal),
+    "output": (MONO_FAMILY, 13, QFont.Weight.Normal),
+}
+
+# Process-wide caches shared by every transcript, delegate and window
+_fonts: Dict[str, QFont] = {}
+_metrics: Dict[str, QFontMetrics] = {}
+_avatars: Dict[Tuple[bool, int, float], QPixmap] = {}
+
+
+def font(name: str) -> QFont:
+    """Shared QFont for one of the FONT_SPECS roles"""
+    cached = _fonts.get(name)
+    if cached is None:
+        family, pixel_size, weight = FONT_SPECS[name]
+        cached = QFont(family)
+        cached.setPixelSize(pixel_size)
+        cached.setWeight(weight)
+        if family == MONO_FAMILY:
+            cached.setStyleHint(QFont.StyleHint.Monospace)
+        _fonts[name] = cached
+    return cached
+
+
+def font_metrics(name: str) -> QFontMetrics:
+    cached = _metrics.get(name)
+    if cached is None:
+        cached = QFontMetrics(font(name))
+        _metrics[name] = cached
+    return cached
+
+
+def avatar(is_assistant: bool, size: int = 38, dpr: float = 1.0) -> QPixmap:
+    """Circular avatar, rendered once per role, size and device pixel ratio"""
+    key = (is_assistant, size, dpr)
+    pixmap = _avatars.get(key)
+    if pixmap is None:
+        pixmap = _render_avatar(is_assistant, size, dpr)
+        _avatars[key] = pixmap
+    return pixmap
+
+
+def _render_avatar(is_assistant: bool, size: int, dpr: float) -> QPixmap:
+    target = QPixmap(int(size * dpr), int(size * dpr))
+    target.setDevicePixelRatio(dpr)
+    target.fill(Qt.GlobalColor.transparent)
+
+    painter = QPainter(target)
+    painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+    bg_color = QColor("#4F46E5") if is_assistant else QColor("#52525B")
+    painter.setBrush(QBrush(bg_color))
+    painter.setPen(Qt.PenStyle.NoPen)
+    painter.drawEllipse(0, 0, size, size)
+
+    icon_path = os.path.join(ICON_DIR, "assistant_icon.png" if is_assistant else "user_icon.png")
+    icon_size = int(size * 0.6)  # Icon takes up 60% of the circle
+    icon_padding = (size - icon_size) // 2
+    icon = QPixmap(icon_path).scaled(
+        int(icon_size * dpr),
+        int(icon_size * dpr),
+        Qt.AspectRatioMode.KeepAspectRatio,
+        Qt.TransformationMode.SmoothTransformation
+    )
+    icon.setDevicePixelRatio(dpr)
+    painter.drawPixmap(icon_padding, icon_padding, icon)
+    painter.end()
+    return target
+
+
+def clear() -> None:
+    """Drop every cached resource (e.g. after a screen or font change)"""
+    _fonts.clear()
+    _metrics.clear()
+    _avatars.clear()
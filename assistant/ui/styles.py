@@ -1,54 +1,142 @@
-class ChatStyles:
-    SCROLLBAR ="""
-            QScrollArea {
-                background-color: #ffffff;
-                border: none;
-            }
-            QScrollBar:vertical {
-                border: none;
-                background: #f5f5f5;
-                width: 10px;
-                margin: 0px;
-            }
-            QScrollBar::handle:vertical {
-                background: #d1d5db;
-                border-radius: 5px;
-                min-height: 20px;
-            }
-            QScrollBar::add-line:vertical, QScrollBar::sub-line:vertical {
-                border: none;
-                background: none;
-            }
-        """
-    
-    INPUT_FIELD = """
-            QTextEdit {
-                border: 1px solid #E5E7EB;
-                border-radius: 8px;
-                padding: 12px;
-                background-color: #FFFFFF;  /* White background */
-                color: #111827;            /* Dark text color */
-            }
-            QTextEdit:focus {
-                border: 2px solid #5A67D8;
-            }
-    """
-    
-    SEND_BUTTON = """
-            QPushButton {
-                background-color: #5A67D8;
-                border-radius: 20px;
-                border: none;
-                color: white;            /* White arrow color */
-                font-weight: bold;
-            }
-            QPushButton:hover {
-                background-color: #4C51BF;
-            }
-            QPushButton:pressed {
-                background-color: #434190;
-            }
-            QPushButton:disabled {
-                background-color: #A5B4FC;
-            }
-        """
+from PyQt6.QtWidgets import QApplication
+
+# Single application-level stylesheet. Widgets opt in through their object
+# name instead of parsing their own stylesheet on construction.
+APP_STYLESHEET = """
+    QListView#chatArea {
+        background-color: #151518;
+        border: none;
+        padding: 12px 0px;
+    }
+
+    /* Scroll bars are polished before their scroll area gets an object name,
+       so they are styled application-wide rather than per view */
+    QScrollBar:vertical {
+        border: none;
+        background: #27272A;
+        width: 8px;
+        margin: 0px;
+    }
+    QScrollBar::handle:vertical {
+        background: #3F3F46;
+        border-radius: 4px;
+        min-height: 20px;
+    }
+    QScrollBar:horizontal {
+        border: none;
+        background: #27272A;
+        height: 8px;
+        margin: 0px;
+    }
+    QScrollBar::handle:horizontal {
+        background: #3F3F46;
+        border-radius: 4px;
+        min-width: 20px;
+    }
+    QScrollBar::add-line, QScrollBar::sub-line {
+        border: none;
+        background: none;
+    }
+
+    QTabWidget#sessionTabs::pane {
+        border: none;
+    }
+    QTabBar::tab {
+        background-color: #1C1C1F;
+        color: #A1A1AA;
+        border: none;
+        border-bottom: 2px solid transparent;
+        padding: 8px 16px;
+    }
+    QTabBar::tab:selected {
+        color: #E4E4E7;
+        border-bottom: 2px solid #4F46E5;
+    }
+    QTabBar::tab:hover {
+        color: #E4E4E7;
+    }
+    QToolButton#newSessionButton {
+        background-color: transparent;
+        border: none;
+        color: #A1A1AA;
+        font-size: 18px;
+        padding: 0px 12px;
+    }
+    QToolButton#newSessionButton:hover {
+        color: #E4E4E7;
+    }
+
+    QTextEdit#messageEditor {
+        background-color: #1C1C1F;
+        border: 1px solid #4F46E5;
+        border-radius: 6px;
+        color: #E4E4E7;
+        selection-background-color: #4F46E5;
+        selection-color: white;
+    }
+
+    QPlainTextEdit#commandOutput {
+        background-color: #27272A;
+        border: none;
+        color: #E4E4E7;
+        selection-background-color: #4F46E5;
+        selection-color: white;
+    }
+
+    QWidget#inputContainer {
+        background-color: #1C1C1F;
+        border-top: 1px solid #27272A;
+    }
+
+    QTextEdit#messageInput {
+        border: 1px solid #3F3F46;
+        border-radius: 12px;
+        padding: 16px;
+        background-color: #27272A;
+        color: #E4E4E7;
+    }
+    QTextEdit#messageInput:focus {
+        border: 2px solid #4F46E5;
+        background-color: #27272A;
+    }
+
+    QPushButton#sendButton {
+        background-color: #4F46E5;
+        border: none;
+        border-radius: 8px;
+        color: white;
+        font-size: 20px;
+    }
+    QPushButton#sendButton:hover {
+        background-color: #4338CA;
+    }
+    QPushButton#sendButton:pressed {
+        background-color: #3730A3;
+    }
+    QPushButton#sendButton:disabled {
+        background-color: #3F3F46;
+    }
+
+    QPushButton#stopButton {
+        background-color: #3F3F46;
+        border: none;
+        border-radius: 8px;
+        color: #E4E4E7;
+        font-size: 16px;
+    }
+    QPushButton#stopButton:hover {
+        background-color: #DC2626;
+        color: white;
+    }
+
+    QLabel#queueLabel {
+        color: #A1A1AA;
+        font-size: 13px;
+        border: none;
+    }
+"""
+
+
+def apply_stylesheet(app: QApplication) -> None:
+    """Install the application stylesheet once, before any window is built"""
+    app.setStyleSheet(APP_STYLESHEET)
@@ -0,0 +1,375 @@
+import math
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+from PyQt6.QtWidgets import QStyledItemDelegate, QStyle, QTextEdit
+from PyQt6.QtCore import Qt, QAbstractListModel, QModelIndex, QRect, QRectF, QSize
+from PyQt6.QtGui import (QAbstractTextDocumentLayout, QColor, QPainter, QPalette, QPen,
+                         QTextCursor, QTextDocument)
+from ..services.output_store import HEAD_LINES, TAIL_LINES, StoredOutput
+from . import resources
+from .output_viewer import CommandOutputViewer
+
+MessageRole = Qt.ItemDataRole.UserRole + 1
+
+# Tallest rect handed to QFontMetrics when measuring wrapped text
+MAX_TEXT_HEIGHT = 1 << 24
+# Outputs longer than this are collapsed to a summary plus head and tail lines
+OUTPUT_VISIBLE_LINES = HEAD_LINES
+OUTPUT_PREVIEW_LINES = TAIL_LINES
+
+
+@dataclass
+class MessageItem:
+    is_assistant: bool
+    message: str
+    timestamp: Optional[str] = None
+    tool_name: Optional[str] = None
+    command_output: Optional[StoredOutput] = None
+    # Whether a long command output is shown in a paged viewer instead of its summary
+    expanded: bool = False
+    # Backing document while the message is streaming; text is appended, never replaced
+    document: Optional[QTextDocument] = field(default=None, repr=False, compare=False)
+    # (width, row height, text height) from the last layout; dropped whenever the item is edited
+    size_cache: Optional[Tuple[int, int, int]] = field(default=None, repr=False, compare=False)
+
+    def plain_text(self) -> str:
+        """Text used when the message is copied to the clipboard"""
+        message = self.document.toPlainText() if self.document is not None else self.message
+        parts = [message] if message else []
+        if self.command_output:
+            parts.append(self.command_output.read())
+        return "\n".join(parts)
+
+    def is_collapsible(self) -> bool:
+        return bool(self.command_output) and self.command_output.line_count > OUTPUT_VISIBLE_LINES
+
+
+class TranscriptModel(QAbstractListModel):
+    """Flat list of chat messages backing the virtualized transcript"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.items: List[MessageItem] = []
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.items)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        item = self.items[index.row()]
+        if role == MessageRole:
+            return item
+        if role == Qt.ItemDataRole.DisplayRole:
+            return item.message
+        return None
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.ItemFlag.NoItemFlags
+        # Editable only so a read-only editor can be opened for partial text selection
+        return (Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable |
+                Qt.ItemFlag.ItemIsEditable)
+
+    def append(self, item: MessageItem) -> int:
+        row = len(self.items)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.items.append(item)
+        self.endInsertRows()
+        return row
+
+    def update_message(self, row: int, message: str):
+        item = self.items[row]
+        item.message = message
+        item.size_cache = None
+        index = self.index(row)
+        self.dataChanged.emit(index, index)
+
+    def append_text(self, row: int, text: str):
+        """Append streamed text to a message without re-setting what is already there"""
+        item = self.items[row]
+        if item.document is None:
+            item.document = QTextDocument()
+            item.document.setDocumentMargin(0)
+            item.document.setUndoRedoEnabled(False)
+            if item.message:
+                item.document.setPlainText(item.message)
+        cursor = QTextCursor(item.document)
+        cursor.movePosition(QTextCursor.MoveOperation.End)
+        cursor.insertText(text)
+        item.size_cache = None
+        index = self.index(row)
+        self.dataChanged.emit(index, index)
+
+    def finish_stream(self, row: int):
+        """Fold the streaming document back into plain text"""
+        item = self.items[row]
+        if item.document is None:
+            return
+        item.message = item.document.toPlainText()
+        item.document = None
+        item.size_cache = None
+        index = self.index(row)
+        self.dataChanged.emit(index, index)
+
+    def set_expanded(self, row: int, expanded: bool):
+        item = self.items[row]
+        item.expanded = expanded
+        item.size_cache = None
+        index = self.index(row)
+        self.dataChanged.emit(index, index)
+
+    def clear(self):
+        self.beginResetModel()
+        self.items = []
+        self.endResetModel()
+
+
+class MessageDelegate(QStyledItemDelegate):
+    """Paints a message row directly instead of building a widget tree per message"""
+    PADDING_H = 24
+    PADDING_V = 12
+    SPACING = 12
+    AVATAR_SIZE = 38
+    AVATAR_GAP = 16
+    ROLE_GAP = 8
+    TOOL_HEIGHT = 32
+    OUTPUT_PADDING = 16
+    OUTPUT_HEADER_GAP = 8
+
+    def __init__(self, view):
+        super().__init__(view)
+        self.view = view
+
+        self.timestamp_font = resources.font("timestamp")
+        self.role_font = resources.font("role")
+        self.message_font = resources.font("message")
+        self.tool_font = resources.font("tool")
+        self.output_font = resources.font("output")
+
+        self.timestamp_metrics = resources.font_metrics("timestamp")
+        self.role_metrics = resources.font_metrics("role")
+        self.message_metrics = resources.font_metrics("message")
+        self.output_metrics = resources.font_metrics("output")
+
+    def _content_width(self, width: int) -> int:
+        return max(1, width - 2 * self.PADDING_H - self.AVATAR_SIZE - self.AVATAR_GAP)
+
+    def _prepare_document(self, item: MessageItem, width: int) -> QTextDocument:
+        document = item.document
+        if document.defaultFont() != self.message_font:
+            document.setDefaultFont(self.message_font)
+        document.setTextWidth(self._content_width(width))
+        return document
+
+    def _text_height(self, item: MessageItem, width: int) -> int:
+        if item.document is not None:
+            if item.document.isEmpty():
+                return 0
+            return math.ceil(self._prepare_document(item, width).size().height())
+        if not item.message:
+            return 0
+        return self.message_metrics.boundingRect(
+            QRect(0, 0, self._content_width(width), MAX_TEXT_HEIGHT),
+            Qt.TextFlag.TextWordWrap,
+            item.message
+        ).height()
+
+    def _output_lines(self, item: MessageItem) -> List[str]:
+        """Lines painted for an output that is not expanded into a viewer"""
+        output = item.command_output
+        if not item.is_collapsible():
+            return output.head or [""]
+        hidden = output.line_count - OUTPUT_PREVIEW_LINES - len(output.tail)
+        return (output.head[:OUTPUT_PREVIEW_LINES] +
+                [f"⋯ {hidden:,} more lines"] +
+                output.tail)
+
+    def _output_height(self, item: MessageItem) -> int:
+        if not item.command_output:
+            return 0
+        line_height = self.output_metrics.lineSpacing()
+        height = 2 * self.OUTPUT_PADDING
+        if item.is_collapsible():
+            height += line_height + self.OUTPUT_HEADER_GAP
+        if item.expanded:
+            return height + line_height * OUTPUT_VISIBLE_LINES
+        return height + line_height * len(self._output_lines(item))
+
+    def output_rects(self, item: MessageItem, row_rect: QRect) -> Tuple[QRect, QRect, QRect]:
+        """Box, summary header and body of a row's command output"""
+        height = self._output_height(item)
+        box = QRect(row_rect.x() + self.PADDING_H, row_rect.bottom() - self.PADDING_V - height + 1,
+                    row_rect.width() - 2 * self.PADDING_H, height)
+        inner = box.adjusted(self.OUTPUT_PADDING, self.OUTPUT_PADDING,
+                             -self.OUTPUT_PADDING, -self.OUTPUT_PADDING)
+        if not item.is_collapsible():
+            return box, QRect(inner.topLeft(), QSize(inner.width(), 0)), inner
+        header_height = self.output_metrics.lineSpacing()
+        header = QRect(inner.x(), inner.y(), inner.width(), header_height)
+        body = inner.adjusted(0, header_height + self.OUTPUT_HEADER_GAP, 0, 0)
+        return box, header, body
+
+    def _row_height(self, item: MessageItem, width: int, text_height: int) -> int:
+        height = self.PADDING_V * 2
+        if item.timestamp:
+            height += self.timestamp_metrics.height() + self.SPACING
+        content = self.role_metrics.height() + self.ROLE_GAP + text_height
+        if item.tool_name:
+            content += self.TOOL_HEIGHT
+        height += max(self.AVATAR_SIZE, content)
+        if item.command_output:
+            height += self.SPACING + self._output_height(item)
+        return height
+
+    def _layout(self, item: MessageItem, width: int) -> Tuple[int, int]:
+        """Row and text height at width, laid out once and cached on the item"""
+        if item.size_cache is None or item.size_cache[0] != width:
+            text_height = self._text_height(item, width)
+            item.size_cache = (width, self._row_height(item, width, text_height), text_height)
+        return item.size_cache[1], item.size_cache[2]
+
+    def sizeHint(self, option, index):
+        item = index.data(MessageRole)
+        width = self.view.viewport().width()
+        return QSize(width, self._layout(item, width)[0])
+
+    def paint(self, painter, option, index):
+        item = index.data(MessageRole)
+        rect = option.rect
+        painter.save()
+        painter.setClipRect(rect)
+
+        if option.state & QStyle.StateFlag.State_Selected:
+            painter.fillRect(rect, QColor(79, 70, 229, 40))
+
+        x = rect.x() + self.PADDING_H
+        y = rect.y() + self.PADDING_V
+        width = rect.width() - 2 * self.PADDING_H
+
+        # Timestamp
+        if item.timestamp:
+            painter.setFont(self.timestamp_font)
+            painter.setPen(QColor("#71717A"))
+            height = self.timestamp_metrics.height()
+            painter.drawText(QRect(x, y, width, height),
+                             Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter,
+                             item.timestamp)
+            y += height + self.SPACING
+
+        # Avatar
+        painter.drawPixmap(x, y, resources.avatar(item.is_assistant, self.AVATAR_SIZE,
+                                                  painter.device().devicePixelRatioF()))
+
+        # Role label
+        content_x = x + self.AVATAR_SIZE + self.AVATAR_GAP
+        content_width = self._content_width(rect.width())
+        content_y = y
+        painter.setFont(self.role_font)
+        painter.setPen(QColor("#E4E4E7"))
+        height = self.role_metrics.height()
+        painter.drawText(QRect(content_x, content_y, content_width, height),
+                         Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter,
+                         "Assistant" if item.is_assistant else "You")
+        content_y += height + self.ROLE_GAP
+
+        # Message text
+        text_height = self._layout(item, rect.width())[1]
+        if item.document is not None:
+            if text_height:
+                # Sets the document's font and wrap width, as sizing did
+                self._prepare_document(item, rect.width())
+            context = QAbstractTextDocumentLayout.PaintContext()
+            context.palette.setColor(QPalette.ColorRole.Text, QColor("#E4E4E7"))
+            painter.save()
+            painter.translate(content_x, content_y)
+            item.document.documentLayout().draw(painter, context)
+            painter.restore()
+            content_y += text_height
+        elif item.message:
+            painter.setFont(self.message_font)
+            painter.drawText(QRect(content_x, content_y, content_width, text_height),
+                             Qt.TextFlag.TextWordWrap, item.message)
+            content_y += text_height
+
+        # Tool use indication
+        if item.tool_name:
+            painter.setFont(self.tool_font)
+            painter.setPen(QColor("#A1A1AA"))
+            painter.drawText(QRect(content_x, content_y, content_width, self.TOOL_HEIGHT),
+                             Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter,
+                             f"🔧 Using {item.tool_name}")
+            content_y += self.TOOL_HEIGHT
+
+        # Command output
+        if item.command_output:
+            self._paint_command_output(painter, item, rect)
+
+        painter.restore()
+
+    def _paint_command_output(self, painter, item: MessageItem, row_rect: QRect):
+        box, header, body = self.output_rects(item, row_rect)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.setPen(QPen(QColor("#3F3F46"), 1))
+        painter.setBrush(QColor("#27272A"))
+        painter.drawRoundedRect(QRectF(box).adjusted(0.5, 0.5, -0.5, -0.5), 6, 6)
+
+        painter.setFont(self.output_font)
+        if item.is_collapsible():
+            output = item.command_output
+            summary = (f"{'▾' if item.expanded else '▸'} {output.line_count:,} lines · "
+                       f"{_format_size(output.size)} — click to "
+                       f"{'collapse' if item.expanded else 'expand'}")
+            painter.setPen(QColor("#A1A1AA"))
+            painter.drawText(header, Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter,
+                             summary)
+        if item.expanded:
+            # The body is covered by a CommandOutputViewer
+            return
+
+        painter.setPen(QColor("#E4E4E7"))
+        line_height = self.output_metrics.lineSpacing()
+        for i, line in enumerate(self._output_lines(item)):
+            line_rect = QRect(body.x(), body.y() + i * line_height, body.width(), line_height)
+            elided = self.output_metrics.elidedText(line, Qt.TextElideMode.ElideRight,
+                                                    body.width())
+            painter.drawText(line_rect, Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter,
+                             elided)
+
+    def createEditor(self, parent, option, index):
+        """Read-only editor so part of a message can be selected and copied"""
+        if not index.data(Qt.ItemDataRole.DisplayRole):
+            return None
+        editor = QTextEdit(parent)
+        editor.setReadOnly(True)
+        editor.setTextInteractionFlags(
+            Qt.TextInteractionFlag.TextSelectableByMouse |
+            Qt.TextInteractionFlag.TextSelectableByKeyboard
+        )
+        editor.setObjectName("messageEditor")
+        editor.setFont(self.message_font)
+        return editor
+
+    def setEditorData(self, editor, index):
+        editor.setPlainText(index.data(Qt.ItemDataRole.DisplayRole))
+
+    def setModelData(self, editor, model, index):
+        pass
+
+    def updateEditorGeometry(self, editor, option, index):
+        if isinstance(editor, CommandOutputViewer):
+            _, _, body = self.output_rects(index.data(MessageRole), option.rect)
+            # QPlainTextEdit adds a 4px document margin; line its text up with the header
+            editor.setGeometry(body.adjusted(-4, -4, self.OUTPUT_PADDING - 1,
+                                             self.OUTPUT_PADDING - 1))
+            return
+        editor.setGeometry(option.rect.adjusted(self.PADDING_H, self.PADDING_V,
+                                                -self.PADDING_H, -self.PADDING_V))
+
+
+def _format_size(size: int) -> str:
+    if size < 1024:
+        return f"{size} B"
+    if size < 1024 * 1024:
+        return f"{size / 1024:.1f} KB"
+    return f"{size / (1024 * 1024):.1f} MB"
@@ -0,0 +1,292 @@
+import itertools
+import queue
+import threading
+import time
+from PyQt6 import sip
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLabel
+from PyQt6.QtCore import pyqtSignal, QCoreApplication, QThread, QObject
+from ..ui.components import StyledChatArea, StyledInputField, StyledSendButton, StyledStopButton
+from ..services import tracing
+from ..services.agent import AgentEngine
+from ..services.cancellation import CancellationToken
+from ..services.output_store import OutputStore, StoredOutput
+from ..services.registry import Services
+from ..services.session import Session
+
+class MessageWorker(QObject):
+    """Long-lived worker that runs queued prompts one at a time in a background thread"""
+    task_started = pyqtSignal(int, str)  # task id, message
+    task_finished = pyqtSignal(int, str, str, bool)  # task id, message, response, cancelled
+    response_chunk = pyqtSignal(str)  # text delta
+    command_output = pyqtSignal(str, str, object)  # message, tool_name, StoredOutput
+
+    def __init__(self, engine: AgentEngine, output_store: OutputStore):
+        super().__init__()
+        self.engine = engine
+        self.output_store = output_store
+        self.tasks = queue.Queue()
+        self._task_ids = itertools.count(1)
+        self._lock = threading.Lock()
+        # Tokens of tasks submitted and not yet finished, including one run()
+        # has taken off the queue but not started
+        self._tokens = set()
+
+    def submit(self, message: str) -> int:
+        """Queue a prompt; safe to call from any thread"""
+        task_id = next(self._task_ids)
+        token = CancellationToken()
+        with self._lock:
+            self._tokens.add(token)
+        self.tasks.put((task_id, message, token))
+        return task_id
+
+    def pending(self) -> int:
+        return self.tasks.qsize()
+
+    def cancel(self) -> int:
+        """Abort the running task and drop the queued ones; returns how many were dropped"""
+        dropped = 0
+        while True:
+            try:
+                task = self.tasks.get_nowait()
+            except queue.Empty:
+                break
+            if task is None:
+                self.tasks.put(None)
+                break
+            dropped += 1
+        with self._lock:
+            for token in self._tokens:
+                token.cancel()
+            self._tokens.clear()
+        return dropped
+
+    def stop(self):
+        """Cancel everything and let run() return"""
+        self.cancel()
+        self.tasks.put(None)
+
+    def run(self):
+        threading.current_thread().name = "MessageWorker"
+        while True:
+            task = self.tasks.get()
+            if task is None:
+                break
+            task_id, message, token = task
+            with tracing.span("worker.task", cat="worker", task_id=task_id):
+                tracing.flow_out("task_started", self)
+                self.task_started.emit(task_id, message)
+                # Stopped between leaving the queue and starting: don't run it
+                response = "" if token.cancelled else self.process_message(message, token)
+                with self._lock:
+                    self._tokens.discard(token)
+                tracing.flow_out("task_finished", self)
+                self.task_finished.emit(task_id, message, response, token.cancelled)
+
+    def process_message(self, message: str, token: CancellationToken) -> str:
+        response = ""
+        try:
+            for event in self.engine.run(message, token):
+                if event.type == "text":
+                    response += event.text
+                    tracing.flow_out("response_chunk", self)
+                    self.response_chunk.emit(event.text)
+                elif event.type == "tool_result":
+                    output = (event.output or "") + (event.error or "")
+                    if output:
+                        # Stored off the UI thread so huge outputs never cross it as text
+                        with tracing.span("worker.store_output", cat="worker", chars=len(output)):
+                            stored = self.output_store.put(output)
+                        tracing.flow_out("command_output", self)
+                        self.command_output.emit("", event.tool, stored)
+                elif event.type == "error":
+                    print(f"Error processing message: {event.error}")
+        except Exception as e:
+            print(f"Error processing message: {e}")
+        return response
+
+# Worker threads whose run() has not returned yet. They belong to the application,
+# not to a view, so closing a tab never deletes a thread that is still finishing a task.
+_running_threads = set()
+
+
+def release_workers(timeout_ms: int) -> None:
+    """On quit: wait up to timeout_ms for stopped workers to finish. Any still
+    running are detached so that tearing down the application never destroys
+    a running QThread; the process exits around them."""
+    deadline = time.monotonic() + timeout_ms / 1000
+    for thread in list(_running_threads):
+        thread.wait(max(0, int((deadline - time.monotonic()) * 1000)))
+    for thread in list(_running_threads):
+        if thread.isRunning():
+            print("Worker still busy at quit; leaving it to exit with the process")
+            thread.setParent(None)
+            sip.transferto(thread, None)
+
+
+class SessionView(QWidget):
+    """Transcript, input and worker for one session; ChatWindow shows one per tab"""
+    busy_changed = pyqtSignal(bool)
+
+    def __init__(self, session: Session, services: Services, parent=None):
+        super().__init__(parent)
+        self.session = session
+        self.services = services
+        self.worker = None
+        self.thread = None
+        self.outstanding = 0  # submitted tasks that have not finished or been dropped
+
+        self.init_ui()
+
+    def ensure_worker(self) -> MessageWorker:
+        """Start the session's persistent worker thread on first use"""
+        if self.worker is None:
+            engine = self.services.make_engine(self.session)
+            thread = QThread(QCoreApplication.instance())
+            self.thread = thread
+            self.worker = MessageWorker(engine, self.services.output_store)
+            self.worker.moveToThread(thread)
+            thread.worker = self.worker  # outlives the view while the task winds down
+            thread.started.connect(self.worker.run)
+            thread.finished.connect(thread.deleteLater)
+            thread.finished.connect(lambda: _running_threads.discard(thread))
+            _running_threads.add(thread)
+
+            # Connect message handling signals
+            self.worker.task_started.connect(self.on_task_started)
+            self.worker.task_finished.connect(self.on_task_finished)
+            self.worker.response_chunk.connect(self.handle_response)
+            self.worker.command_output.connect(self.handle_command)
+
+            self.thread.start()
+        return self.worker
+
+    def send_message(self):
+        message = self.input_field.toPlainText().strip()
+        if not message:
+            return
+
+        # Input stays enabled; messages sent while busy run as follow-ups
+        self.input_field.clear()
+        self.ensure_worker().submit(message)
+        self.outstanding += 1
+        self.update_task_state()
+
+    def stop_tasks(self):
+        if self.worker:
+            self.outstanding -= self.worker.cancel()
+            self.update_task_state()
+
+    @tracing.traced("ui.task_started", cat="ui")
+    def on_task_started(self, task_id: int, message: str):
+        tracing.flow_in("task_started", self.worker)
+        # Show user message
+        self.chat_area.append_message(is_assistant=False, message=message)
+        self.update_task_state()
+
+    @tracing.traced("ui.response_chunk", cat="ui")
+    def handle_response(self, delta: str):
+        """Handle streaming response chunks"""
+        tracing.flow_in("response_chunk", self.worker)
+        self.chat_area.append_stream(delta)
+
+    @tracing.traced("ui.command_output", cat="ui")
+    def handle_command(self, message: str, tool_name: str, command_output: StoredOutput):
+        """Handle command output"""
+        tracing.flow_in("command_output", self.worker)
+        self.chat_area.append_message(
+            is_assistant=True,
+            message=message,
+            tool_name=tool_name,
+            command_output=command_output
+        )
+        self.chat_area.end_stream()
+
+    @tracing.traced("ui.task_finished", cat="ui")
+    def on_task_finished(self, task_id: int, message: str, response: str, cancelled: bool):
+        """Save the conversation once a task completes or is stopped"""
+        tracing.flow_in("task_finished", self.worker)
+        self.chat_area.end_stream()
+        if cancelled:
+            self.chat_area.append_message(is_assistant=True, message="Stopped.")
+            self.chat_area.end_stream()
+        self.session.history_manager.save_conversation(message, response)
+
+        self.outstanding = max(0, self.outstanding - 1)
+        self.update_task_state()
+
+    def update_task_state(self):
+        queued = self.worker.pending() if self.worker else 0
+        self.stop_button.setVisible(self.outstanding > 0)
+        self.queue_label.setText(f"{queued} queued" if queued else "")
+        self.queue_label.setVisible(bool(queued))
+        self.busy_changed.emit(self.outstanding > 0)
+
+    def shutdown(self):
+        """Cancel running work and stop the worker thread without waiting for it;
+        the thread deletes itself once the cancelled task returns. The
+        transcript is cleared, deleting its spilled outputs."""
+        if self.worker:
+            self.worker.stop()
+            self.thread.quit()
+            self.worker = None
+            self.thread = None
+        self.chat_area.clear()
+
+    def init_ui(self):
+        layout = QVBoxLayout(self)
+        layout.setSpacing(16)  # Add spacing between chat area and input
+        layout.setContentsMargins(0, 0, 0, 0)  # Remove margins
+
+        # Chat area
+        self.chat_area = StyledChatArea(self.services.output_store)
+        layout.addWidget(self.chat_area)
+
+        # Input container with fixed height
+        input_container = QWidget()
+        input_container.setObjectName("inputContainer")
+        input_container.setFixedHeight(120)
+
+        # Input container layout with padding
+        input_layout = QHBoxLayout(input_container)
+        input_layout.setContentsMargins(24, 16, 24, 16)  # Add padding
+        input_layout.setSpacing(16)  # Space between input and button
+
+        # Input field, queue indicator, stop and send buttons
+        self.input_field = StyledInputField()
+        self.queue_label = QLabel()
+        self.queue_label.setObjectName("queueLabel")
+        self.queue_label.hide()
+        self.stop_button = StyledStopButton()
+        self.stop_button.hide()
+        self.send_button = StyledSendButton()
+        input_layout.addWidget(self.input_field)
+        input_layout.addWidget(self.queue_label)
+        input_layout.addWidget(self.stop_button)
+        input_layout.addWidget(self.send_button)
+
+        layout.addWidget(input_container)
+
+        # Connect signals
+        self.send_button.clicked.connect(self.send_message)
+        self.input_field.enterPressed.connect(self.send_message)
+        self.stop_button.clicked.connect(self.stop_tasks)
+        self.input_field.textChanged.connect(self.update_send_button_state)
+
+    def update_send_button_state(self):
+        self.send_button.setEnabled(bool(self.input_field.toPlainText().strip()))
+
+    def load_chat_history(self):
+        self.chat_area.clear()
+        for conversation in self.session.history_manager.load_history():
+            self.chat_area.append_message(
+                is_assistant=False,
+                message=conversation['message'],
+                timestamp=conversation['timestamp']
+            )
+            self.chat_area.append_message(
+                is_assistant=True,
+                message=conversation['response'],
+                timestamp=conversation['timestamp']
+            )
+        self.chat_area.scroll_to_bottom()
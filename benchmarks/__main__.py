@@ -0,0 +1,70 @@
+"""Run the benchmark suite headless, optionally saving or comparing results.
+
+    python -m benchmarks                                 # everything
+    python -m benchmarks sse history                     # selected suites
+    python -m benchmarks --save baseline.json            # store a baseline
+    python -m benchmarks --compare baseline.json         # flag regressions
+
+With --compare the exit status is 1 when any benchmark's p50 is more than
+--threshold slower than in the baseline. Baselines are machine specific:
+save one on the machine (and branch) you want to compare against.
+"""
+import argparse
+import importlib
+import os
+import sys
+from .harness import REGRESSION_THRESHOLD, compare, report, save
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+# Suite name -> (module, keyword arguments for its run())
+SUITES = {
+    "sse": ("bench_sse", {}),
+    "history": ("bench_history", {}),
+    "screenshot": ("bench_screenshot", {}),
+    "request_body": ("bench_request_body", {}),
+    "executor": ("bench_executor", {}),
+    "transcript": ("bench_transcript", {"messages": 1_000}),
+    "streaming": ("bench_streaming", {}),
+    "resources": ("bench_resources", {}),
+    "event_loop": ("bench_event_loop", {}),
+    "startup": ("bench_startup", {}),
+    "batch": ("bench_batch", {}),
+}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("suites", nargs="*", metavar="suite",
+                        help=f"suites to run (default: all of {', '.join(SUITES)})")
+    parser.add_argument("--save", metavar="PATH", help="write results as JSON")
+    parser.add_argument("--compare", metavar="PATH", help="compare against a saved baseline")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD,
+                        help="allowed p50 slowdown before flagging (default: %(default)s)")
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.suites if name not in SUITES]
+    if unknown:
+        parser.error(f"unknown suite: {', '.join(unknown)}")
+
+    results = []
+    for name in args.suites or SUITES:
+        module_name, kwargs = SUITES[name]
+        print(f"running {name}...", file=sys.stderr)
+        module = importlib.import_module(f".{module_name}", __package__)
+        results.extend(module.run(**kwargs))
+
+    report(results)
+    if args.save:
+        save(results, args.save)
+    if args.compare:
+        print()
+        regressions = compare(results, args.compare, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,54 @@
+"""Throughput of the batch runner itself, fully offline.
+
+Every task is played back by ScriptedClient, so the numbers are the
+harness overhead: engine turns, one shell per task, result
+writing and the thread pool. "chat" tasks reply with text only; "bash"
+tasks make one bash call before replying.
+
+Run from the repository root:  python -m benchmarks.bench_batch
+"""
+import os
+import tempfile
+from typing import List
+from .harness import Result, measure, report
+
+TASKS = 200
+CONCURRENCY = (1, 4, 16)
+
+CHAT_TURNS = [[{"text": "Nothing to do."}]]
+BASH_TURNS = [
+    [{"text": "Checking."}, {"tool": "bash", "input": {"command": "echo hello"}}],
+    [{"text": "Done."}],
+]
+
+
+def run(tasks: int = TASKS) -> List[Result]:
+    from assistant.batch import BatchRunner, BatchTask
+    from assistant.services.scripted_client import ScriptedClient
+
+    batch = [BatchTask(str(i), f"task {i}") for i in range(tasks)]
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        results_path = os.path.join(directory, "results.jsonl")
+
+        def clear_results():
+            if os.path.exists(results_path):
+                os.remove(results_path)
+
+        for kind, turns in (("chat", CHAT_TURNS), ("bash", BASH_TURNS)):
+            client = ScriptedClient({}, default=turns)
+            for concurrency in CONCURRENCY:
+                runner = BatchRunner(client, concurrency, work_root=directory)
+                results.append(measure(
+                    f"batch.{kind} x{tasks} concurrency={concurrency}",
+                    lambda: runner.run(batch, results_path),
+                    repeat=3, setup=clear_results,
+                ))
+    return results
+
+
+if __name__ == "__main__":
+    results = run()
+    report(results)
+    for result in results:
+        print(f"{result.name}: {TASKS / result.p50:.0f} tasks/s")
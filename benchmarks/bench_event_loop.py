@@ -0,0 +1,81 @@
+"""Input-to-paint latency under the offscreen platform.
+
+A background thread posts key presses to a probe widget at random intervals;
+latency is the time from posting to the widget's next paint. "polling"
+reproduces the old setup, where a foreign main loop pumped Qt with
+processEvents() every 100 ms; "integrated" runs the Qt tray backend's loop.
+
+Run from the repository root:  python -m benchmarks.bench_event_loop
+"""
+import random
+import threading
+import time
+from typing import List
+from .harness import Result, offscreen_app, report
+
+EVENTS = 200
+POLL_INTERVAL = 0.1
+
+
+def _run(driver: str, events: int) -> Result:
+    from PyQt6.QtCore import QCoreApplication, QEvent, Qt
+    from PyQt6.QtGui import QKeyEvent
+    from PyQt6.QtWidgets import QWidget
+    from assistant.tray.qt_tray import QtTray
+
+    app = offscreen_app()
+    latencies = []
+    posted = []
+    done = threading.Event()
+
+    class Probe(QWidget):
+        def keyPressEvent(self, event):
+            self.update()
+
+        def paintEvent(self, event):
+            now = time.perf_counter()
+            while posted:
+                latencies.append(now - posted.pop(0))
+            if len(latencies) >= events:
+                done.set()
+                if driver == "integrated":
+                    QCoreApplication.quit()
+
+    probe = Probe()
+    probe.resize(100, 100)
+    probe.show()
+    app.processEvents()
+
+    def key_event():
+        return QKeyEvent(QEvent.Type.KeyPress, Qt.Key.Key_A, Qt.KeyboardModifier.NoModifier, "a")
+
+    # The first key event registers the primary keyboard device; do that on this thread
+    key_event()
+
+    def typist():
+        rng = random.Random(0)
+        for _ in range(events):
+            time.sleep(rng.uniform(0.005, 0.03))
+            posted.append(time.perf_counter())
+            QCoreApplication.postEvent(probe, key_event())
+
+    thread = threading.Thread(target=typist, daemon=True)
+    thread.start()
+    if driver == "polling":
+        while not done.is_set():
+            time.sleep(POLL_INTERVAL)
+            app.processEvents()
+    else:
+        tray = QtTray("Assistant", "")
+        tray.run(app)
+    thread.join()
+    probe.close()
+    return Result(f"event_loop.{driver} input-to-paint", latencies[:events])
+
+
+def run(events: int = EVENTS) -> List[Result]:
+    return [_run("polling", events), _run("integrated", events)]
+
+
+if __name__ == "__main__":
+    report(run())
@@ -0,0 +1,39 @@
+"""Per-command overhead of running shell commands.
+
+CommandExecutor spawns a new shell for every command; BashSession keeps
+one shell alive and only pays for the command itself.
+
+Run from the repository root:  python -m benchmarks.bench_executor
+"""
+from typing import List
+from .harness import Result, measure, report
+
+COMMANDS = 100
+
+
+def run(commands: int = COMMANDS) -> List[Result]:
+    from assistant.services.command_executor import BashSession, CommandExecutor
+
+    executor = CommandExecutor()
+    session = BashSession()
+
+    def spawn():
+        for _ in range(commands):
+            executor.execute_command("true")
+
+    def persistent():
+        for _ in range(commands):
+            session.execute_command("true")
+
+    try:
+        session.execute_command("true")  # start the shell outside the timing
+        return [
+            measure(f"executor.command_executor x{commands}", spawn, repeat=5),
+            measure(f"executor.bash_session x{commands}", persistent, repeat=5),
+        ]
+    finally:
+        session.close()
+
+
+if __name__ == "__main__":
+    report(run())
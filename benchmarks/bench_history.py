@@ -0,0 +1,45 @@
+"""HistoryManager cost with a long history.
+
+save_conversation rewrites the whole file, so both operations grow with
+the number of stored entries.
+
+Run from the repository root:  python -m benchmarks.bench_history
+"""
+import json
+import os
+import tempfile
+from typing import List
+from .harness import Result, measure, report
+
+ENTRIES = 10_000
+
+
+def _seed(path: str, entries: int):
+    history = [{
+        "timestamp": "10:00 AM · Jan 01, 2025",
+        "message": f"Question {i}: " + "what is in my downloads folder " * (1 + i % 5),
+        "response": f"Answer {i}: " + "here are the files I found " * (1 + i % 9),
+    } for i in range(entries)]
+    with open(path, 'w') as f:
+        json.dump(history, f, indent=2)
+
+
+def run(entries: int = ENTRIES) -> List[Result]:
+    from assistant.services.history_manager import HistoryManager
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "history.json")
+        manager = HistoryManager(path)
+        _seed(path, entries)
+        size = os.path.getsize(path)
+        return [
+            measure(f"history.load_history[{entries}]", manager.load_history,
+                    repeat=5, bytes=size),
+            measure(f"history.save_conversation[{entries}]",
+                    lambda: manager.save_conversation("one more question", "one more answer"),
+                    repeat=5, setup=lambda: _seed(path, entries), bytes=size),
+        ]
+
+
+if __name__ == "__main__":
+    report(run())
@@ -0,0 +1,155 @@
+"""Serialization time and peak memory of requests carrying many screenshots.
+
+"json" is the old path: the request dict handed to requests with json=,
+which builds the whole body as a str and then as bytes. "stream" is
+RequestBody, which writes the image data from the message strings in
+chunks. Sends go to the loopback SSE server from bench_sse, each in a
+fresh interpreter so its peak RSS is that send's own.
+
+Run from the repository root:  python -m benchmarks.bench_request_body
+"""
+import base64
+import json
+import os
+import random
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+from .bench_sse import SSEServer, sse_body
+from .harness import Result, measure, report
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCREENSHOTS = 8
+# Roughly a PNG of a busy 2880x1800 screen at full resolution
+IMAGE_BYTES = 3_000_000
+
+SEND_SCRIPT = """
+import sys, time
+from benchmarks.bench_request_body import peak_rss, prepare, screenshot_messages
+send = prepare(sys.argv[1], sys.argv[2])
+messages = screenshot_messages(int(sys.argv[3]), int(sys.argv[4]))
+before = peak_rss()
+start = time.perf_counter()
+send(messages)
+seconds = time.perf_counter() - start
+print(f"seconds={seconds:.6f}")
+print(f"peak_rss_growth={peak_rss() - before}")
+"""
+
+
+def peak_rss() -> int:
+    """This process's peak resident set size in bytes"""
+    # On Linux ru_maxrss starts out at the parent's peak after fork; VmHWM does not
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def screenshot_messages(screenshots: int = SCREENSHOTS,
+                        image_bytes: int = IMAGE_BYTES) -> List[Dict]:
+    """An agent conversation with one tool-result screenshot per turn"""
+    from assistant.services.tools import ToolResult
+    image = base64.b64encode(random.Random(0).randbytes(image_bytes)).decode('ascii')
+    messages = [{"role": "user", "content": "Open Chrome."}]
+    for i in range(screenshots):
+        tool_id = f"toolu_{i}"
+        messages.append({"role": "assistant", "content": [
+            {"type": "text", "text": "Taking a screenshot."},
+            {"type": "tool_use", "id": tool_id, "name": "computer",
+             "input": {"action": "screenshot"}}
+        ]})
+        # A distinct string per turn, as real screenshots would be
+        data = image[i:] + image[:i]
+        messages.append({"role": "user",
+                         "content": [ToolResult(base64_image=data).to_content(tool_id)]})
+    return messages
+
+
+def request_data(messages: List[Dict]) -> Dict:
+    from assistant.services.api_client import DEFAULT_MAX_TOKENS, MODEL, tool_schemas
+    return {"model": MODEL, "max_tokens": DEFAULT_MAX_TOKENS, "stream": True,
+            "tools": tool_schemas(), "messages": messages}
+
+
+def prepare(how: str, url: str):
+    """A send(messages) function for the "json" or "stream" path, with imports
+    and the connection pool already loaded"""
+    from assistant.services.api_client import AnthropicClient
+    client = AnthropicClient("bench")
+    client.base_url = url
+    session = client._transport()
+
+    def send_json(messages):
+        with session.post(f"{url}/messages", headers=client.headers,
+                          json=request_data(messages), stream=True) as response:
+            for _ in response.iter_lines():
+                pass
+
+    def send_stream(messages):
+        for _ in client.stream_response(messages):
+            pass
+
+    return {"json": send_json, "stream": send_stream}[how]
+
+
+def _send_in_subprocess(how: str, url: str, screenshots: int,
+                        image_bytes: int) -> Tuple[float, float]:
+    """(seconds, peak RSS growth in MB) for one send in a fresh interpreter"""
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    completed = subprocess.run(
+        [sys.executable, "-c", SEND_SCRIPT, how, url, str(screenshots), str(image_bytes)],
+        cwd=ROOT, env=env, capture_output=True, text=True, timeout=120
+    )
+    values = dict(line.split("=", 1) for line in completed.stdout.splitlines() if "=" in line)
+    if "seconds" not in values:
+        raise RuntimeError(f"send run failed:\n{completed.stderr}")
+    return float(values["seconds"]), int(values["peak_rss_growth"]) / 1e6
+
+
+def run(screenshots: int = SCREENSHOTS, image_bytes: int = IMAGE_BYTES,
+        repeat: int = 3) -> List[Result]:
+    from assistant.services.api_client import RequestBody
+
+    label = f"{screenshots}x{image_bytes // 1_000_000}MB"
+    data = request_data(screenshot_messages(screenshots, image_bytes))
+    body_bytes = len(RequestBody(data))
+
+    def stream():
+        for _ in RequestBody(data):
+            pass
+
+    results = [
+        measure(f"request_body.serialize.json[{label}]",
+                lambda: json.dumps(data).encode('utf-8'), repeat=10, bytes=body_bytes),
+        measure(f"request_body.serialize.stream[{label}]", stream, repeat=10, bytes=body_bytes),
+    ]
+
+    server = SSEServer(sse_body(10, 10))
+    try:
+        for how in ("json", "stream"):
+            runs = [_send_in_subprocess(how, server.url, screenshots, image_bytes)
+                    for _ in range(repeat)]
+            results.append(Result(f"request_body.send.{how}[{label}]",
+                                  [seconds for seconds, _ in runs],
+                                  {"bytes": body_bytes,
+                                   "peak_rss_growth_mb": round(max(mb for _, mb in runs), 1)}))
+    finally:
+        server.shutdown()
+        server.server_close()
+    return results
+
+
+if __name__ == "__main__":
+    results = run()
+    report(results)
+    for r in results:
+        if "peak_rss_growth_mb" in r.extra:
+            print(f"{r.name}: peak RSS +{r.extra['peak_rss_growth_mb']} MB")
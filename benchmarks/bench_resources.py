@@ -0,0 +1,83 @@
+"""Per-message construction cost with and without the shared render cache.
+
+"uncached" drops the process-wide avatar/font cache before every message and
+styles widgets with their own stylesheet, which is what each message used to
+pay; "cached" is the steady state.
+
+Run from the repository root:  python -m benchmarks.bench_resources
+"""
+from typing import List
+from .harness import Result, measure, offscreen_app, report
+
+MESSAGES = 200
+
+EDITOR_STYLESHEET = """
+    QTextEdit {
+        background-color: #1C1C1F;
+        border: 1px solid #4F46E5;
+        border-radius: 6px;
+        color: #E4E4E7;
+        selection-background-color: #4F46E5;
+        selection-color: white;
+    }
+"""
+
+
+def run(messages: int = MESSAGES) -> List[Result]:
+    app = offscreen_app()
+    from PyQt6.QtWidgets import QTextEdit
+    from assistant.ui import resources
+    from assistant.ui.components import StyledChatArea
+
+    area = StyledChatArea()
+    area.resize(800, 600)
+    area.show()
+    app.processEvents()
+
+    def append_messages(cached: bool):
+        area.clear()
+        for i in range(messages):
+            if not cached:
+                resources.clear()
+            area.append_message(is_assistant=bool(i % 2), message=f"Message {i}",
+                                timestamp="10:00 AM · Jan 01, 2025")
+            area.doItemsLayout()
+            area.viewport().repaint()
+
+    results = [
+        measure(f"message.uncached x{messages}", lambda: append_messages(False), repeat=3),
+        measure(f"message.cached x{messages}", lambda: append_messages(True), repeat=3),
+    ]
+
+    def render_avatars():
+        for i in range(messages):
+            resources.clear()
+            resources.avatar(bool(i % 2))
+
+    def lookup_avatars():
+        for i in range(messages):
+            resources.avatar(bool(i % 2))
+
+    results.append(measure(f"avatar.render x{messages}", render_avatars, repeat=3))
+    results.append(measure(f"avatar.cached x{messages}", lookup_avatars, repeat=3))
+
+    def build_editors(inline: bool):
+        for _ in range(messages):
+            editor = QTextEdit()
+            if inline:
+                editor.setStyleSheet(EDITOR_STYLESHEET)
+            else:
+                editor.setObjectName("messageEditor")
+            editor.ensurePolished()
+            editor.deleteLater()
+        app.processEvents()
+
+    results.append(measure(f"widget.inline_stylesheet x{messages}",
+                           lambda: build_editors(True), repeat=3))
+    results.append(measure(f"widget.app_stylesheet x{messages}",
+                           lambda: build_editors(False), repeat=3))
+    return results
+
+
+if __name__ == "__main__":
+    report(run())
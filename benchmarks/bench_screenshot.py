@@ -0,0 +1,75 @@
+"""Screenshot resize, PNG encode and base64 cost on synthetic frames.
+
+"computer" is Computer.screenshot with the capture replaced by a synthetic
+frame. "file" is the path take_screenshot.py uses: resize, save the PNG to
+disk, read it back and base64 it.
+
+Run from the repository root:  python -m benchmarks.bench_screenshot
+"""
+import base64
+import os
+import random
+import tempfile
+from typing import List, Tuple
+from .harness import Result, measure, report
+
+# Common capture sizes: a 1x laptop screen and the same screen at Retina scale
+FRAME_SIZES = ((1440, 900), (2880, 1800))
+
+
+def synthetic_frame(size: Tuple[int, int], seed: int = 0):
+    """Desktop-like RGB frame: a gradient with a few hundred flat 'windows' and 'text' runs"""
+    from PIL import Image, ImageDraw
+    rng = random.Random(seed)
+    width, height = size
+    frame = Image.linear_gradient("L").resize(size).convert("RGB")
+    draw = ImageDraw.Draw(frame)
+    for _ in range(300):
+        x, y = rng.randrange(width), rng.randrange(height)
+        w, h = rng.randrange(20, width // 3), rng.randrange(10, height // 4)
+        draw.rectangle((x, y, x + w, y + h), fill=tuple(rng.randrange(256) for _ in range(3)))
+    for _ in range(2000):
+        x, y = rng.randrange(width), rng.randrange(height)
+        draw.line((x, y, x + rng.randrange(10, 200), y), fill=(20, 20, 20), width=2)
+    return frame
+
+
+class _FakeScreen:
+    def __init__(self, frame):
+        self.frame = frame
+
+    def screenshot(self):
+        return self.frame.copy()
+
+    def size(self):
+        return self.frame.size
+
+
+def run() -> List[Result]:
+    from PIL import Image
+    from assistant.services.computer import Computer
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "screenshot.png")
+        for size in FRAME_SIZES:
+            frame = synthetic_frame(size)
+            screen = _FakeScreen(frame)
+            computer = Computer()
+            computer._gui = lambda: screen
+            label = f"{size[0]}x{size[1]}"
+
+            results.append(measure(f"screenshot.computer[{label}]", computer.screenshot, repeat=10,
+                                   base64_bytes=len(computer.screenshot())))
+
+            def via_file():
+                frame.resize((1024, 768), Image.Resampling.LANCZOS).save(path)
+                with open(path, 'rb') as f:
+                    base64.b64encode(f.read()).decode('utf-8')
+
+            results.append(measure(f"screenshot.file[{label}]", via_file, repeat=10))
+    return results
+
+
+if __name__ == "__main__":
+    report(run())
@@ -0,0 +1,95 @@
+"""SSE parsing cost of AnthropicClient.stream_response against a local server.
+
+The server replays a canned Messages API stream (text deltas followed by a
+tool call streamed as partial JSON) over loopback, so the numbers are the
+client's read-and-parse cost rather than network or model latency.
+
+Run from the repository root:  python -m benchmarks.bench_sse
+"""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List
+from .harness import Result, measure, report
+
+TEXT_DELTAS = 5_000
+JSON_DELTAS = 500
+
+
+def _event(data: dict) -> bytes:
+    return f"event: {data['type']}\ndata: {json.dumps(data)}\n\n".encode('utf-8')
+
+
+def sse_body(text_deltas: int = TEXT_DELTAS, json_deltas: int = JSON_DELTAS) -> bytes:
+    events = [_event({"type": "message_start", "message": {"id": "msg_bench", "usage": {}}}),
+              _event({"type": "content_block_start", "index": 0,
+                      "content_block": {"type": "text", "text": ""}})]
+    events += [_event({"type": "content_block_delta", "index": 0,
+                       "delta": {"type": "text_delta", "text": f" token{i}"}})
+               for i in range(text_deltas)]
+    events.append(_event({"type": "content_block_stop", "index": 0}))
+    events.append(_event({"type": "content_block_start", "index": 1,
+                          "content_block": {"type": "tool_use", "id": "toolu_bench",
+                                            "name": "bash", "input": {}}}))
+    command = json.dumps({"command": "echo " + "x" * json_deltas})
+    events += [_event({"type": "content_block_delta", "index": 1,
+                       "delta": {"type": "input_json_delta", "partial_json": part}})
+               for part in (command[i:i + 8] for i in range(0, len(command), 8))]
+    events.append(_event({"type": "content_block_stop", "index": 1}))
+    events.append(_event({"type": "message_delta", "delta": {"stop_reason": "tool_use"},
+                          "usage": {"output_tokens": text_deltas}}))
+    events.append(_event({"type": "message_stop"}))
+    return b"".join(events)
+
+
+class SSEServer(ThreadingHTTPServer):
+    """Loopback server answering every POST with the same event stream"""
+    daemon_threads = True
+
+    def __init__(self, body: bytes):
+        self.body = body
+        super().__init__(("127.0.0.1", 0), _Handler)
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Content-Length", str(len(self.server.body)))
+        self.end_headers()
+        self.wfile.write(self.server.body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def run(text_deltas: int = TEXT_DELTAS) -> List[Result]:
+    from assistant.services.api_client import AnthropicClient
+
+    server = SSEServer(sse_body(text_deltas))
+    client = AnthropicClient("bench")
+    client.base_url = server.url
+
+    def consume():
+        for _ in client.stream_response("benchmark"):
+            pass
+
+    try:
+        consume()  # warm the connection pool and imports
+        return [measure(f"sse.stream_response[{text_deltas} deltas]", consume, repeat=10,
+                        bytes=len(server.body))]
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    report(run())
@@ -0,0 +1,108 @@
+"""Import time and time-to-first-paint of the GUI entry point.
+
+Both run in fresh interpreters: imports are measured with -X importtime,
+first paint by launching the app offscreen (with a seeded history) and
+timing until the chat window paints.
+
+Run from the repository root:  python -m benchmarks.bench_startup
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+from .harness import Result, report
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HISTORY_ENTRIES = 1_000
+# Modules that must not be imported before the first paint
+HEAVY_MODULES = ("requests", "pyautogui", "PIL", "rumps")
+
+FIRST_PAINT_SCRIPT = """
+import time
+start = time.perf_counter()
+from PyQt6.QtCore import QTimer
+from assistant.main import MenuBarApp
+app = MenuBarApp(tray_backend="qt")
+def painted():
+    print(f"first_paint={time.perf_counter() - start:.6f}", flush=True)
+    QTimer.singleShot(0, app.quit_app)
+app.chat_window.first_painted.connect(painted)
+app.run()
+"""
+
+
+def _env(home: str) -> Dict[str, str]:
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen", HOME=home, PYTHONPATH=ROOT)
+    env.pop("ANTHROPIC_API_KEY", None)
+    return env
+
+
+def import_times(module: str = "assistant.main") -> Dict[str, float]:
+    """Cumulative import time in seconds of every module imported by module"""
+    with tempfile.TemporaryDirectory() as home:
+        completed = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=ROOT, env=_env(home), capture_output=True, text=True, check=True
+        )
+    times = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(cumulative) / 1e6
+    return times
+
+
+def _seed_history(home: str, entries: int):
+    path = os.path.join(home, "Library", "Application Support", "MacAssistant", "history.json")
+    os.makedirs(os.path.dirname(path))
+    with open(path, "w") as f:
+        json.dump([{"timestamp": "10:00 AM · Jan 01, 2025",
+                    "message": f"question {i}",
+                    "response": f"answer {i} " * 20} for i in range(entries)], f)
+
+
+def first_paint(history_entries: int = HISTORY_ENTRIES) -> float:
+    with tempfile.TemporaryDirectory() as home:
+        _seed_history(home, history_entries)
+        completed = subprocess.run(
+            [sys.executable, "-c", FIRST_PAINT_SCRIPT],
+            cwd=ROOT, env=_env(home), capture_output=True, text=True, timeout=120
+        )
+    for line in completed.stdout.splitlines():
+        if line.startswith("first_paint="):
+            return float(line.split("=", 1)[1])
+    raise RuntimeError(f"first-paint run failed:\n{completed.stderr}")
+
+
+def run(repeat: int = 5) -> List[Result]:
+    samples = []
+    for _ in range(repeat):
+        times = import_times()
+        samples.append(times)
+    heavy = sorted({name for times in samples for name in times
+                    if name.split(".")[0] in HEAVY_MODULES})
+    results = [Result("startup.import assistant.main",
+                      [times["assistant.main"] for times in samples],
+                      {"heavy_modules": heavy})]
+    for module in ("assistant.windows.chat_window", "assistant.ui.components", "PyQt6.QtWidgets"):
+        results.append(Result(f"startup.import {module}", [times.get(module, 0.0) for times in samples]))
+
+    wall, in_process = [], []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        in_process.append(first_paint())
+        wall.append(time.perf_counter() - start)
+    results.append(Result(f"startup.first_paint from import [{HISTORY_ENTRIES} history]",
+                          in_process))
+    results.append(Result(f"startup.process_run [{HISTORY_ENTRIES} history]", wall))
+    if heavy:
+        print(f"warning: imported before first paint: {', '.join(heavy)}")
+    return results
+
+
+if __name__ == "__main__":
+    report(run())
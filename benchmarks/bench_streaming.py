@@ -0,0 +1,86 @@
+"""Main-thread cost of rendering a 20k-token streamed response.
+
+Tokens are emitted from a worker thread as fast as possible, the way
+MessageWorker forwards SSE deltas. "replace" re-sets the whole accumulated
+string on every token (the previous behaviour); "coalesced" goes through
+StyledChatArea.append_stream.
+
+Run from the repository root:  python -m benchmarks.bench_streaming
+"""
+import time
+from typing import List
+from .harness import Result, offscreen_app, report
+
+TOKENS = 20_000
+WORDS = ("the", "quick", "brown", "fox", "jumps", "over", "lazy", "dog", "and", "then")
+
+
+def _tokens(count: int) -> List[str]:
+    tokens = []
+    for i in range(count):
+        word = WORDS[i % len(WORDS)]
+        tokens.append(f" {word}" if i % 97 else f" {word}.\n\n")
+    return tokens
+
+
+def _run_stream(mode: str, tokens: List[str], repeat: int) -> Result:
+    from PyQt6.QtCore import QThread, pyqtSignal, QEventLoop
+    from assistant.ui.components import StyledChatArea
+
+    class Emitter(QThread):
+        token = pyqtSignal(str)
+
+        def run(self):
+            for text in tokens:
+                self.token.emit(text)
+
+    app = offscreen_app()
+    area = StyledChatArea()
+    area.resize(800, 600)
+    area.show()
+    app.processEvents()
+
+    samples = []
+    for _ in range(repeat):
+        area.clear()
+        area.append_message(is_assistant=False, message="Write a long story")
+        app.processEvents()
+
+        if mode == "replace":
+            accumulated = []
+
+            def on_token(text):
+                accumulated.append(text)
+                area.append_message(is_assistant=True, message="".join(accumulated))
+                area.scroll_to_bottom()
+        else:
+            on_token = area.append_stream
+
+        emitter = Emitter()
+        emitter.token.connect(on_token)
+        loop = QEventLoop()
+        emitter.finished.connect(loop.quit)
+
+        start = time.thread_time()
+        emitter.start()
+        loop.exec()
+        app.processEvents()
+        area.end_stream()
+        app.processEvents()
+        area.viewport().repaint()
+        samples.append(time.thread_time() - start)
+        emitter.wait()
+
+    return Result(f"stream.{mode}[{len(tokens)} tokens] main-thread cpu", samples)
+
+
+def run(tokens: int = TOKENS) -> List[Result]:
+    stream = _tokens(tokens)
+    return [
+        _run_stream("replace", stream, repeat=1),
+        _run_stream("coalesced", stream, repeat=3),
+    ]
+
+
+if __name__ == "__main__":
+    report(run())
@@ -0,0 +1,57 @@
+"""Append, scroll and resize cost of the chat transcript at 10k messages.
+
+Run from the repository root:  python -m benchmarks.bench_transcript
+"""
+from typing import List
+from .harness import Result, measure, offscreen_app, report
+
+MESSAGES = 10_000
+
+
+def _sample_message(i: int) -> str:
+    return f"Message {i}: " + "the quick brown fox jumps over the lazy dog " * (1 + i % 7)
+
+
+def run(messages: int = MESSAGES) -> List[Result]:
+    app = offscreen_app()
+    from assistant.ui.components import StyledChatArea
+
+    area = StyledChatArea()
+    area.resize(800, 600)
+    area.show()
+    app.processEvents()
+
+    def append_all():
+        area.clear()
+        for i in range(messages):
+            area.append_message(is_assistant=bool(i % 2), message=_sample_message(i),
+                                timestamp="10:00 AM · Jan 01, 2025",
+                                command_output="line\n" * 12 if i % 50 == 0 else None)
+        app.processEvents()
+
+    results = [measure(f"transcript.append[{messages}]", append_all, repeat=3)]
+
+    scrollbar = area.verticalScrollBar()
+
+    def scroll():
+        for value in range(0, scrollbar.maximum(), scrollbar.maximum() // 200 or 1):
+            scrollbar.setValue(value)
+            area.viewport().repaint()
+
+    results.append(measure(f"transcript.scroll[{messages}] x200", scroll, repeat=3))
+
+    widths = iter(range(10_000))
+
+    def resize():
+        area.resize(600 + next(widths) % 2 * 300, 600)
+        app.processEvents()
+        # Adjust mode defers the relayout on a timer; run it inside the measurement
+        area.doItemsLayout()
+        area.viewport().repaint()
+
+    results.append(measure(f"transcript.resize[{messages}]", resize, repeat=10))
+    return results
+
+
+if __name__ == "__main__":
+    report(run())
@@ -0,0 +1,116 @@
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+# A benchmark regresses when its p50 is this much slower than the baseline...
+REGRESSION_THRESHOLD = 0.25
+# ...and slower by at least this many seconds, so microsecond jitter is ignored
+REGRESSION_FLOOR = 0.0005
+
+
+@dataclass
+class Result:
+    name: str
+    samples: List[float]  # seconds
+    extra: dict = field(default_factory=dict)
+
+    @property
+    def min(self) -> float:
+        return min(self.samples)
+
+    @property
+    def mean(self) -> float:
+        return statistics.fmean(self.samples)
+
+    def percentile(self, pct: float) -> float:
+        ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+    @property
+    def p50(self) -> float:
+        return self.percentile(50)
+
+    @property
+    def p99(self) -> float:
+        return self.percentile(99)
+
+
+def measure(name: str, fn: Callable[[], None], repeat: int = 5,
+            setup: Optional[Callable[[], None]] = None, **extra) -> Result:
+    """Time fn() repeat times, calling setup() untimed before each run"""
+    samples = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return Result(name, samples, extra)
+
+
+def report(results: List[Result]) -> None:
+    width = max(len(r.name) for r in results)
+    print(f"{'benchmark':<{width}}  {'min ms':>10}  {'p50 ms':>10}  {'p99 ms':>10}  {'runs':>5}")
+    for r in results:
+        print(f"{r.name:<{width}}  {r.min * 1000:>10.2f}  {r.p50 * 1000:>10.2f}  "
+              f"{r.p99 * 1000:>10.2f}  {len(r.samples):>5}")
+
+
+def to_json(results: List[Result]) -> Dict:
+    """Summary of a run, keyed by benchmark name; times are in seconds"""
+    return {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "results": {
+            r.name: {"min": r.min, "mean": r.mean, "p50": r.p50, "p99": r.p99,
+                     "runs": len(r.samples), **r.extra}
+            for r in results
+        },
+    }
+
+
+def save(results: List[Result], path: str) -> None:
+    with open(path, 'w') as f:
+        json.dump(to_json(results), f, indent=2)
+
+
+def compare(results: List[Result], baseline_path: str,
+            threshold: float = REGRESSION_THRESHOLD) -> List[str]:
+    """Print each benchmark's p50 against the baseline; returns the names that regressed"""
+    with open(baseline_path, 'r') as f:
+        baseline = json.load(f)["results"]
+
+    regressions = []
+    width = max(len(r.name) for r in results)
+    print(f"{'benchmark':<{width}}  {'base ms':>10}  {'now ms':>10}  {'change':>8}")
+    for r in results:
+        before = baseline.get(r.name)
+        if before is None:
+            print(f"{r.name:<{width}}  {'-':>10}  {r.p50 * 1000:>10.2f}  {'new':>8}")
+            continue
+        change = r.p50 / before["p50"] - 1 if before["p50"] else 0.0
+        regressed = change > threshold and r.p50 - before["p50"] > REGRESSION_FLOOR
+        if regressed:
+            regressions.append(r.name)
+        print(f"{r.name:<{width}}  {before['p50'] * 1000:>10.2f}  {r.p50 * 1000:>10.2f}  "
+              f"{change:>+8.0%}{'  REGRESSION' if regressed else ''}")
+    return regressions
+
+
+def offscreen_app():
+    """Styled QApplication on the offscreen platform so benchmarks run headless"""
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt6.QtWidgets import QApplication
+    from assistant.ui.styles import apply_stylesheet
+    app = QApplication.instance()
+    if app is None:
+        app = QApplication([])
+        apply_stylesheet(app)
+    return app